@@ -1,21 +1,67 @@
 from http import HTTPStatus
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 
+from app.metrics import CONTENT_TYPE, Counter, Gauge, MetricsMiddleware, registry
+from app.profiling import ProfilingMiddleware
+from app.responses import FastJSONResponse, FastJSONRoute
 from app.routers import auth, todos, users
+from app.routers.users import taken_cache
 from app.schemas import Message
+from app.security import hash_pool, token_cache, user_cache
+from app.settings import Settings
 
 
-app = FastAPI()
+settings = Settings()
+
+app = FastAPI(default_response_class=FastJSONResponse)
+app.router.route_class = FastJSONRoute
+
+if settings.PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware, profile_dir=settings.PROFILE_DIR)
+
+app.add_middleware(MetricsMiddleware)
 
 app.include_router(auth.router)
 app.include_router(users.router)
 app.include_router(todos.router)
 
 
+@registry.collector
+def runtime_metrics():
+    """Caches e pool de hash já guardam seus contadores; só são lidos na coleta."""
+    cache_hits = Counter("cache_hits_total", "Cache hits.", ("cache",))
+    cache_misses = Counter("cache_misses_total", "Cache misses.", ("cache",))
+    cache_entries = Gauge("cache_entries", "Entries currently stored in the cache.", ("cache",))
+
+    for name, cache in (("user", user_cache), ("token", token_cache), ("taken", taken_cache)):
+        cache_hits.inc((name,), cache.hits)
+        cache_misses.inc((name,), cache.misses)
+        cache_entries.set((name,), len(cache))
+
+    stats = hash_pool.stats()
+    hash_pending = Gauge("hash_pool_pending", "Password hashes queued or running.")
+    hash_pending.set((), stats["pending"])
+    hash_rejected = Counter("hash_pool_rejected_total", "Password hashes rejected because the pool was full.")
+    hash_rejected.inc((), stats["rejected"])
+    hash_count = Counter("hash_pool_hashes_total", "Password hashes computed.")
+    hash_count.inc((), stats["count"])
+    hash_seconds = Counter("hash_pool_hash_seconds_total", "Time spent computing password hashes.")
+    hash_seconds.inc((), stats["hash_seconds"])
+    hash_wait = Counter("hash_pool_wait_seconds_total", "Time password hashes spent waiting for a worker.")
+    hash_wait.inc((), stats["wait_seconds"])
+
+    return (cache_hits, cache_misses, cache_entries, hash_pending, hash_rejected, hash_count, hash_seconds, hash_wait)
+
+
 @app.get("/", status_code=HTTPStatus.OK, response_model=Message)
 def read_root():
     """
     Exemplo de documentação do Python
     """
     return {"message": "Olá Mundo Novo!"}
+
+
+@app.get("/metrics", include_in_schema=False)
+def read_metrics():
+    return Response(registry.render(), media_type=CONTENT_TYPE)
@@ -0,0 +1,80 @@
+"""
+Comandos de manutenção da aplicação.
+
+Uso: `python -m app.cli --help`
+"""
+import asyncio
+from typing import Annotated, Optional
+
+import typer
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import engine
+from app.datagen import generate, parse_distribution
+from app.stats import rebuild_todo_stats
+
+
+cli = typer.Typer(no_args_is_help=True)
+
+
+@cli.callback()
+def main():
+    """Comandos de manutenção do banco da aplicação."""
+
+
+@cli.command("rebuild-stats")
+def rebuild_stats(user_id: Annotated[Optional[int], typer.Option(help="Recalcula só este usuário.")] = None):
+    """Recalcula os contadores de `todo_stats` a partir de `todos`."""
+    async def run():
+        async with AsyncSession(engine) as session:
+            rows = await rebuild_todo_stats(session, user_id)
+
+        await engine.dispose()
+
+        return rows
+
+    rows = asyncio.run(run())
+    typer.echo(f"{rows} stats rows rebuilt")
+
+
+@cli.command("generate-data")
+def generate_data(
+    users: Annotated[int, typer.Option(help="Quantidade de usuários.")] = 1_000,
+    todos_per_user: Annotated[int, typer.Option(help="Todos por usuário.")] = 100,
+    states: Annotated[Optional[str], typer.Option(help="Pesos por estado, ex.: todo=3,doing=1,done=2.")] = None,
+    password: Annotated[str, typer.Option(help="Senha de todos os usuários gerados.")] = "password",
+    prefix: Annotated[str, typer.Option(help="Prefixo dos usernames.")] = "load",
+    batch_size: Annotated[int, typer.Option(help="Linhas por transação.")] = 100_000,
+    seed: Annotated[Optional[int], typer.Option(help="Semente para resultados reproduzíveis.")] = None,
+    defer_indexes: Annotated[bool, typer.Option(help="Refaz FTS e stats no final (SQLite).")] = True,
+):
+    """Gera usuários e todos em massa no `DATABASE_URL`, para testes de carga."""
+    try:
+        distribution = parse_distribution(states)
+    except ValueError as exc:
+        raise typer.BadParameter(str(exc), param_hint="--states")
+
+    async def run():
+        result = await generate(
+            engine,
+            users,
+            todos_per_user,
+            distribution,
+            password=password,
+            prefix=prefix,
+            batch_size=batch_size,
+            seed=seed,
+            defer_indexes=defer_indexes,
+            progress=typer.echo,
+        )
+
+        await engine.dispose()
+
+        return result
+
+    users, todos, elapsed = asyncio.run(run())
+    typer.echo(f"{users} users and {todos} todos generated in {elapsed:.1f}s")
+
+
+if __name__ == "__main__":
+    cli()
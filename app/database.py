@@ -1,11 +1,137 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import Session
+from sqlalchemy import AsyncAdaptedQueuePool, event, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 
+from app.metrics import instrument_engine
 from app.settings import Settings
+from app.slow_queries import instrument_slow_queries
 
-engine = create_engine(Settings().DATABASE_URL)
 
+def sqlite_pragmas(settings: Settings):
+    return (
+        f"PRAGMA journal_mode = {settings.SQLITE_JOURNAL_MODE}",
+        f"PRAGMA synchronous = {settings.SQLITE_SYNCHRONOUS}",
+        f"PRAGMA cache_size = {settings.SQLITE_CACHE_SIZE:d}",
+        f"PRAGMA mmap_size = {settings.SQLITE_MMAP_SIZE:d}",
+        f"PRAGMA busy_timeout = {settings.SQLITE_BUSY_TIMEOUT_MS:d}",
+        f"PRAGMA temp_store = {settings.SQLITE_TEMP_STORE}",
+    )
 
-def get_session(): # pragma: no cover
-    with Session(engine) as session:
+
+def async_url(url):
+    """
+    URL com driver assíncrono. `sqlite://` vira `sqlite+aiosqlite://`; outros
+    drivers síncronos são recusados aqui, com uma mensagem clara, em vez de
+    falharem dentro do `create_async_engine`.
+    """
+    url = make_url(url)
+
+    if url.drivername == "sqlite":
+        return url.set(drivername="sqlite+aiosqlite")
+
+    if not url.get_dialect().is_async:
+        raise ValueError(
+            f"Database URL must use an async driver (e.g. sqlite+aiosqlite://, postgresql+asyncpg://), "
+            f"got {url.drivername}://"
+        )
+
+    return url
+
+
+def create_engine(
+    settings: Settings,
+    url: str | None = None,
+    *,
+    pool_size: int | None = None,
+    max_overflow: int | None = None,
+    read_only: bool = False,
+):
+    """
+    Cria o engine da aplicação com o pool e os PRAGMAs configurados.
+
+    No SQLite os PRAGMAs valem por conexão, então são aplicados a cada nova
+    conexão do pool. O aiosqlite abriria uma conexão nova por checkout
+    (NullPool), perdendo o cache de páginas; bancos em arquivo passam a usar
+    um pool de verdade. Bancos em memória ficam com o pool padrão.
+
+    Com `read_only` o `journal_mode` (que é do arquivo, não da conexão) fica
+    a cargo do engine de escrita e a conexão recusa escritas (`query_only`).
+    """
+    url = async_url(url or settings.DATABASE_URL)
+    options = {}
+
+    if url.get_backend_name() != "sqlite" or url.database not in (None, "", ":memory:"):
+        options.update(
+            poolclass=AsyncAdaptedQueuePool,
+            pool_size=settings.DB_POOL_SIZE if pool_size is None else pool_size,
+            max_overflow=settings.DB_MAX_OVERFLOW if max_overflow is None else max_overflow,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+        )
+
+    engine = create_async_engine(url, **options)
+
+    if url.get_backend_name() == "sqlite":
+        pragmas = sqlite_pragmas(settings)
+
+        if read_only:
+            pragmas = (
+                *(pragma for pragma in pragmas if not pragma.startswith("PRAGMA journal_mode")),
+                "PRAGMA query_only = ON",
+            )
+
+        @event.listens_for(engine.sync_engine, "connect")
+        def set_sqlite_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+
+            for pragma in pragmas:
+                cursor.execute(pragma)
+
+            cursor.close()
+
+    return engine
+
+
+def read_only_url(settings: Settings):
+    """
+    URL do banco de leitura: `DATABASE_READ_URL` (uma réplica, por exemplo)
+    ou, para SQLite em arquivo, o mesmo arquivo aberto com `mode=ro`.
+    """
+    if settings.DATABASE_READ_URL:
+        return settings.DATABASE_READ_URL
+
+    url = make_url(settings.DATABASE_URL)
+
+    if url.get_backend_name() == "sqlite" and url.database not in (None, "", ":memory:"):
+        return url.set(database=f"file:{url.database}", query={ **url.query, "mode": "ro", "uri": "true" })
+
+    return None
+
+
+settings = Settings()
+engine = create_engine(settings)
+
+# Leituras (rotas GET) usam um pool próprio, maior, para não disputar as
+# poucas conexões de escrita. Sem URL de leitura, tudo fica no mesmo engine.
+read_url = read_only_url(settings)
+read_engine = create_engine(
+    settings,
+    read_url,
+    pool_size=settings.DB_READ_POOL_SIZE,
+    max_overflow=settings.DB_READ_MAX_OVERFLOW,
+    read_only=True,
+) if read_url else engine
+
+for instrumented in { engine, read_engine }:
+    instrument_engine(instrumented)
+
+    if settings.SLOW_QUERY_THRESHOLD_MS is not None:
+        instrument_slow_queries(instrumented, settings.SLOW_QUERY_THRESHOLD_MS, settings.SLOW_QUERY_EXPLAIN)
+
+
+async def get_session(): # pragma: no cover
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        yield session
+
+
+async def get_read_session(): # pragma: no cover
+    async with AsyncSession(read_engine, expire_on_commit=False) as session:
         yield session
@@ -0,0 +1,143 @@
+import random
+from time import perf_counter
+
+from sqlalchemy import DDL, func, insert, select, text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from app.models import TODO_STATS_DDL, TODOS_FTS_DDL, Todo, TodoState, User
+from app.security import get_password_hash
+from app.stats import rebuild_todo_stats
+
+
+WORDS = (
+    "comprar", "pagar", "ligar", "enviar", "revisar", "agendar", "limpar", "estudar", "escrever", "ler",
+    "relatório", "conta", "reunião", "email", "projeto", "mercado", "médico", "carro", "casa", "curso",
+    "cliente", "orçamento", "viagem", "presente", "documento", "banco", "aluguel", "backup", "deploy", "código",
+)
+
+# Triggers de INSERT em `todos`: durante a carga ficam desligados e o índice
+# FTS e os contadores são refeitos de uma vez no final.
+INSERT_TRIGGERS = {
+    "todos_fts_insert": next(ddl for ddl in TODOS_FTS_DDL if "TRIGGER todos_fts_insert" in ddl),
+    "todo_stats_insert": next(ddl for ddl in TODO_STATS_DDL if "TRIGGER todo_stats_insert" in ddl),
+}
+
+
+def parse_distribution(spec: str | None):
+    """
+    Lê pesos por estado no formato `todo=3,done=1`; estados omitidos ficam
+    com peso 0. Sem `spec`, todos os estados têm o mesmo peso.
+    """
+    if not spec:
+        return list(TodoState), [1] * len(TodoState)
+
+    weights = {}
+
+    for item in spec.split(","):
+        name, _, weight = item.partition("=")
+        weights[TodoState(name.strip())] = float(weight)
+
+    if not any(weight > 0 for weight in weights.values()):
+        raise ValueError("At least one state must have a positive weight")
+
+    return list(weights), list(weights.values())
+
+
+def fake_text(rng: random.Random, words: int):
+    return " ".join(rng.choices(WORDS, k=words)).capitalize()
+
+
+async def generate(
+    engine: AsyncEngine,
+    users: int,
+    todos_per_user: int,
+    states: tuple[list[TodoState], list[float]],
+    *,
+    password: str = "password",
+    prefix: str = "load",
+    batch_size: int = 100_000,
+    seed: int | None = None,
+    defer_indexes: bool = True,
+    progress=print,
+):
+    """
+    Insere `users` usuários com `todos_per_user` todos cada, em INSERTs do Core
+    de até `batch_size` linhas por transação.
+
+    Todos os usuários recebem o mesmo hash, calculado uma vez. No SQLite, com
+    `defer_indexes`, os triggers de INSERT do FTS e de `todo_stats` são
+    desligados durante a carga e o índice e os contadores são refeitos no
+    final, o que é bem mais rápido que atualizá-los linha a linha. A base
+    não deve receber escritas da aplicação enquanto isso acontece.
+    """
+    rng = random.Random(seed)
+    hashed_password = get_password_hash(password)
+    state_choices, weights = states
+    sqlite = engine.dialect.name == "sqlite"
+    users_per_batch = max(1, batch_size // max(1, todos_per_user))
+    start = perf_counter()
+    total_todos = 0
+
+    async with engine.connect() as conn:
+        if sqlite:
+            await conn.execute(text("PRAGMA synchronous = OFF"))
+
+        first = (await conn.scalar(select(func.max(User.id)))) or 0
+
+        if sqlite and defer_indexes:
+            for name in INSERT_TRIGGERS:
+                await conn.execute(text(f"DROP TRIGGER IF EXISTS {name}"))
+            await conn.commit()
+
+        try:
+            for offset in range(0, users, users_per_batch):
+                count = min(users_per_batch, users - offset)
+                usernames = [f"{prefix}{first + offset + i + 1}" for i in range(count)]
+
+                user_ids = await conn.scalars(
+                    insert(User).returning(User.id, sort_by_parameter_order=True),
+                    [
+                        { "username": username, "email": f"{username}@example.com", "password": hashed_password }
+                        for username in usernames
+                    ]
+                )
+                user_ids = user_ids.all()
+
+                if todos_per_user:
+                    todo_states = rng.choices(state_choices, weights, k=count * todos_per_user)
+                    await conn.execute(insert(Todo), [
+                        {
+                            "title": fake_text(rng, 3),
+                            "description": fake_text(rng, 8),
+                            "state": todo_states[i],
+                            "user_id": user_ids[i // todos_per_user],
+                        }
+                        for i in range(count * todos_per_user)
+                    ])
+
+                await conn.commit()
+
+                total_todos += count * todos_per_user
+                elapsed = perf_counter() - start
+                progress(
+                    f"{offset + count}/{users} users, {total_todos} todos"
+                    f" ({(offset + count + total_todos) / elapsed:,.0f} rows/s)"
+                )
+        finally:
+            if sqlite and defer_indexes:
+                await conn.rollback()
+
+                for ddl in INSERT_TRIGGERS.values():
+                    await conn.execute(DDL(ddl))
+
+                progress("rebuilding full-text index")
+                await conn.execute(text("INSERT INTO todos_fts(todos_fts) VALUES ('rebuild')"))
+                await conn.commit()
+
+    if sqlite and defer_indexes:
+        progress("rebuilding todo stats")
+
+        async with AsyncSession(engine) as session:
+            await rebuild_todo_stats(session)
+
+    return users, total_todos, perf_counter() - start
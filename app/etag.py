@@ -0,0 +1,27 @@
+from hashlib import blake2b
+from http import HTTPStatus
+
+from fastapi import Request, Response
+
+
+def make_etag(*parts):
+    digest = blake2b(repr(parts).encode(), digest_size=12).hexdigest()
+
+    return f'W/"{digest}"'
+
+
+def etag_matches(request: Request, etag: str):
+    """Compara o If-None-Match da requisição com o ETag (comparação fraca)."""
+    header = request.headers.get("if-none-match")
+
+    if not header:
+        return False
+
+    if header.strip() == "*":
+        return True
+
+    return etag.removeprefix("W/") in (tag.strip().removeprefix("W/") for tag in header.split(","))
+
+
+def not_modified(etag: str):
+    return Response(status_code=HTTPStatus.NOT_MODIFIED, headers={ "ETag": etag })
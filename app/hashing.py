@@ -0,0 +1,78 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from time import perf_counter
+
+from fastapi import HTTPException
+
+
+class HashWorkerPool:
+    """
+    Executor dedicado para o Argon2.
+
+    O hash roda fora do threadpool compartilhado do Starlette (o argon2-cffi
+    libera o GIL, então threads bastam). Quando `max_pending` chamadas já estão
+    em andamento, novas chamadas recebem 503 na hora em vez de entrar na fila.
+
+    Uma chamada só deixa de contar quando o hash termina no executor: se a
+    requisição for cancelada (cliente desconectou), o trabalho em andamento
+    continua ocupando a vaga.
+    """
+
+    def __init__(self, max_workers: int, max_pending: int):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self.rejected = 0
+        self.count = 0
+        self.hash_seconds = 0.0
+        self.max_hash_seconds = 0.0
+        self.wait_seconds = 0.0
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="argon2")
+
+    async def run(self, func, *args):
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=HTTPStatus.SERVICE_UNAVAILABLE,
+                detail="Server busy, try again later",
+                headers={ "Retry-After": "1" }
+            )
+
+        loop = asyncio.get_running_loop()
+        self.pending += 1
+        start = perf_counter()
+
+        future = self._executor.submit(self._timed, func, *args)
+        future.add_done_callback(lambda _: loop.call_soon_threadsafe(self._release))
+
+        result, elapsed = await asyncio.wrap_future(future)
+
+        self.count += 1
+        self.hash_seconds += elapsed
+        self.max_hash_seconds = max(self.max_hash_seconds, elapsed)
+        self.wait_seconds += perf_counter() - start - elapsed
+
+        return result
+
+    def _release(self):
+        self.pending -= 1
+
+    @staticmethod
+    def _timed(func, *args):
+        start = perf_counter()
+        result = func(*args)
+
+        return result, perf_counter() - start
+
+    def stats(self):
+        return {
+            "workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "pending": self.pending,
+            "rejected": self.rejected,
+            "count": self.count,
+            "hash_seconds": self.hash_seconds,
+            "max_hash_seconds": self.max_hash_seconds,
+            "wait_seconds": self.wait_seconds,
+        }
@@ -0,0 +1,314 @@
+"""
+Métricas no formato texto do Prometheus, sem dependências externas.
+
+O middleware `MetricsMiddleware` mede cada requisição (latência, requisições
+em andamento e status) por rota, usando o template do path (`/todos/{id}`)
+para não criar uma série por id. `instrument_engine` conta, pelos eventos do
+SQLAlchemy, quantos comandos SQL cada requisição executou e quanto tempo
+passaram no banco.
+"""
+from bisect import bisect_left
+from contextvars import ContextVar
+from weakref import WeakKeyDictionary
+from time import perf_counter
+
+from sqlalchemy import event
+from starlette.routing import Match
+
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def format_labels(labelnames: tuple[str, ...], values: tuple) -> str:
+    if not labelnames:
+        return ""
+
+    pairs = (
+        '{}="{}"'.format(name, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for name, value in zip(labelnames, values)
+    )
+
+    return "{" + ",".join(pairs) + "}"
+
+
+def format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    type = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.values: dict[tuple, float] = {}
+
+    def samples(self):
+        for labels, value in self.values.items():
+            yield self.name, format_labels(self.labelnames, labels), value
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} {self.type}"
+
+        for name, labels, value in self.samples():
+            yield f"{name}{labels} {format_value(value)}"
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, labels: tuple = (), amount: float = 1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+
+class Gauge(Metric):
+    type = "gauge"
+
+    def set(self, labels: tuple, value: float):
+        self.values[labels] = value
+
+    def inc(self, labels: tuple = (), amount: float = 1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def dec(self, labels: tuple = (), amount: float = 1):
+        self.inc(labels, -amount)
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = (), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(buckets)
+        self.counts: dict[tuple, list[int]] = {}
+        self.sums: dict[tuple, float] = {}
+
+    def observe(self, labels: tuple, value: float):
+        counts = self.counts.get(labels)
+
+        if counts is None:
+            counts = self.counts[labels] = [0] * (len(self.buckets) + 1)
+            self.sums[labels] = 0
+
+        # Guarda só a contagem do bucket; o acumulado é feito na leitura.
+        counts[bisect_left(self.buckets, value)] += 1
+        self.sums[labels] += value
+
+    def samples(self):
+        bucket_labelnames = (*self.labelnames, "le")
+
+        for labels, counts in self.counts.items():
+            total = 0
+
+            for bound, count in zip((*self.buckets, float("inf")), counts):
+                total += count
+                yield f"{self.name}_bucket", format_labels(bucket_labelnames, (*labels, format_value(bound))), total
+
+            label_text = format_labels(self.labelnames, labels)
+            yield f"{self.name}_sum", label_text, self.sums[labels]
+            yield f"{self.name}_count", label_text, total
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: list[Metric] = []
+        self.collectors = []
+
+    def register(self, metric: Metric):
+        self.metrics.append(metric)
+
+        return metric
+
+    def collector(self, func):
+        """Registra uma função que devolve métricas calculadas na hora da coleta."""
+        self.collectors.append(func)
+
+        return func
+
+    def render(self) -> str:
+        metrics = [*self.metrics]
+
+        for collect in self.collectors:
+            metrics.extend(collect())
+
+        return "\n".join(line for metric in metrics for line in metric.render()) + "\n"
+
+
+registry = Registry()
+
+http_requests = registry.register(Counter(
+    "http_requests_total", "HTTP requests by route and status code.", ("method", "route", "status")
+))
+http_request_duration = registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route.", ("method", "route")
+))
+http_requests_in_progress = registry.register(Gauge(
+    "http_requests_in_progress", "HTTP requests currently being handled.", ("method", "route")
+))
+db_queries_per_request = registry.register(Histogram(
+    "http_request_db_queries", "SQL statements executed per request.", ("method", "route"), QUERY_COUNT_BUCKETS
+))
+db_time_per_request = registry.register(Histogram(
+    "http_request_db_duration_seconds", "Time spent executing SQL per request.", ("method", "route")
+))
+db_queries = registry.register(Counter(
+    "db_queries_total", "SQL statements executed."
+))
+db_query_seconds = registry.register(Counter(
+    "db_query_duration_seconds_total", "Total time spent executing SQL statements."
+))
+db_query_errors = registry.register(Counter(
+    "db_query_errors_total", "SQL statements that raised an error."
+))
+
+
+class RequestStats:
+    __slots__ = ("method", "route", "queries", "query_seconds")
+
+    def __init__(self, method: str = "", route: str = ""):
+        self.method = method
+        self.route = route
+        self.queries = 0
+        self.query_seconds = 0.0
+
+
+request_stats: ContextVar[RequestStats | None] = ContextVar("request_stats", default=None)
+
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # No contexto da execução, e não em `conn.info` (que vive tanto quanto a
+    # conexão do pool): comandos que falham não deixam nada para trás.
+    context._query_start = perf_counter()
+
+
+def record_query(conn, statement, parameters, context, executemany, failed: bool = False):
+    start = getattr(context, "_query_start", None)
+
+    if start is None:
+        return
+
+    elapsed = perf_counter() - start
+    context._query_start = None
+
+    db_queries.inc()
+    db_query_seconds.inc((), elapsed)
+
+    if failed:
+        db_query_errors.inc()
+
+    stats = request_stats.get()
+
+    if stats is not None:
+        stats.queries += 1
+        stats.query_seconds += elapsed
+
+    for observer in query_observers.get(conn.engine, ()):
+        observer(conn, statement, parameters, context, executemany, elapsed)
+
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    record_query(conn, statement, parameters, context, executemany)
+
+
+def handle_error(exception_context):
+    context = exception_context.execution_context
+
+    if context is not None:
+        record_query(
+            exception_context.connection,
+            exception_context.statement,
+            exception_context.parameters,
+            context,
+            context.executemany,
+            failed=True,
+        )
+
+
+# Funções chamadas com o tempo de cada comando já medido, por engine; assim
+# outros consumidores (o log de consultas lentas) não medem tudo de novo.
+query_observers: WeakKeyDictionary = WeakKeyDictionary()
+
+
+def instrument_engine(engine):
+    """Liga a contagem de comandos SQL a um engine (síncrono ou assíncrono)."""
+    sync_engine = getattr(engine, "sync_engine", engine)
+
+    if event.contains(sync_engine, "before_cursor_execute", before_cursor_execute):
+        return
+
+    event.listen(sync_engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", after_cursor_execute)
+    event.listen(sync_engine, "handle_error", handle_error)
+
+
+def add_query_observer(engine, observer):
+    """Registra `observer(conn, statement, parameters, context, executemany, elapsed)`."""
+    sync_engine = getattr(engine, "sync_engine", engine)
+
+    instrument_engine(sync_engine)
+    query_observers.setdefault(sync_engine, []).append(observer)
+
+
+def route_label(scope) -> str:
+    """
+    Template da rota que vai atender a requisição, resolvido antes de
+    chamar a aplicação para já contar a requisição como em andamento.
+    """
+    for route in scope["app"].router.routes:
+        match, _ = route.matches(scope)
+
+        if match == Match.FULL:
+            return route.path
+
+    return "unmatched"
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI puro (sem `BaseHTTPMiddleware`), para não criar uma task
+    extra por requisição. Paths sem rota (os 404) ficam agrupados em
+    `unmatched`.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        labels = (scope["method"], route_label(scope))
+        status = 500
+        stats = RequestStats(*labels)
+        token = request_stats.set(stats)
+
+        async def send_wrapper(message):
+            nonlocal status
+
+            if message["type"] == "http.response.start":
+                status = message["status"]
+
+            await send(message)
+
+        http_requests_in_progress.inc(labels)
+        start = perf_counter()
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = perf_counter() - start
+
+            http_requests_in_progress.dec(labels)
+            http_requests.inc((*labels, status))
+            http_request_duration.observe(labels, elapsed)
+            db_queries_per_request.observe(labels, stats.queries)
+            db_time_per_request.observe(labels, stats.query_seconds)
+            request_stats.reset(token)
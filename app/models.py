@@ -1,13 +1,38 @@
 from datetime import datetime
 from enum import Enum
 
-from sqlalchemy import ForeignKey, func
+from sqlalchemy import DDL, DateTime, ForeignKey, Index, column, event, func, table
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.orm import Mapped, registry, mapped_column, relationship
+from sqlalchemy.sql.functions import FunctionElement
 
 
 table_registry = registry()
 
 
+class precise_now(FunctionElement):
+    """
+    `now()` com frações de segundo também no SQLite.
+
+    O CURRENT_TIMESTAMP do SQLite só tem segundos, o que deixaria duas
+    alterações no mesmo segundo com o mesmo `updated_at` (e o mesmo ETag).
+    Usado na inserção e na atualização; o `server_default` continua valendo
+    para quem insere direto no banco.
+    """
+    type = DateTime()
+    inherit_cache = True
+
+
+@compiles(precise_now)
+def compile_precise_now(element, compiler, **kw):
+    return "CURRENT_TIMESTAMP"
+
+
+@compiles(precise_now, "sqlite")
+def compile_precise_now_sqlite(element, compiler, **kw):
+    return "strftime('%Y-%m-%d %H:%M:%f', 'now')"
+
+
 class TodoState(str, Enum):
     draft = "draft"
     todo = "todo"
@@ -19,13 +44,16 @@ class TodoState(str, Enum):
 @table_registry.mapped_as_dataclass
 class User:
     __tablename__ = "users"
+    __mapper_args__ = { "eager_defaults": True }
 
     id: Mapped[int] = mapped_column(init=False, primary_key=True)
     username: Mapped[str] = mapped_column(unique=True)
     password: Mapped[str]
     email: Mapped[str] = mapped_column(unique=True)
-    created_at: Mapped[datetime] = mapped_column(init=False, server_default=func.now())
-    updated_at: Mapped[datetime] = mapped_column(init=False, server_default=func.now(), onupdate=func.now())
+    created_at: Mapped[datetime] = mapped_column(init=False, server_default=func.now(), insert_default=precise_now())
+    updated_at: Mapped[datetime] = mapped_column(
+        init=False, server_default=func.now(), insert_default=precise_now(), onupdate=precise_now()
+    )
 
     todos: Mapped[list["Todo"]] = relationship(init=False, back_populates="user", cascade="all, delete-orphan")
 
@@ -33,14 +61,104 @@ class User:
 @table_registry.mapped_as_dataclass
 class Todo:
     __tablename__ = "todos"
+    __table_args__ = (
+        Index("ix_todos_user_id_state", "user_id", "state"),
+        Index("ix_todos_user_id_id", "user_id", "id"),
+    )
+    __mapper_args__ = { "eager_defaults": True }
 
     id: Mapped[int] = mapped_column(init=False, primary_key=True)
     title: Mapped[str]
     description: Mapped[str]
     state: Mapped[TodoState]
-    created_at: Mapped[datetime] = mapped_column(init=False, server_default=func.now())
-    updated_at: Mapped[datetime] = mapped_column(init=False, server_default=func.now(), onupdate=func.now())
+    created_at: Mapped[datetime] = mapped_column(init=False, server_default=func.now(), insert_default=precise_now())
+    updated_at: Mapped[datetime] = mapped_column(
+        init=False, server_default=func.now(), insert_default=precise_now(), onupdate=precise_now()
+    )
 
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
 
     user: Mapped[User] = relationship(init=False, back_populates="todos")
+
+
+@table_registry.mapped_as_dataclass
+class TodoStat:
+    __tablename__ = "todo_stats"
+
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), primary_key=True)
+    state: Mapped[TodoState] = mapped_column(primary_key=True)
+    count: Mapped[int] = mapped_column(default=0)
+
+
+# Índice FTS5 (SQLite) sobre título e descrição, mantido por triggers.
+# O `user_id` também é indexado para que a busca já filtre pelo dono.
+todos_fts = table("todos_fts", column("rowid"), column("rank"))
+
+TODOS_FTS_DDL = (
+    """
+    CREATE VIRTUAL TABLE todos_fts USING fts5(
+        title, description, user_id,
+        content='todos', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER todos_fts_insert AFTER INSERT ON todos BEGIN
+        INSERT INTO todos_fts(rowid, title, description, user_id)
+        VALUES (new.id, new.title, new.description, new.user_id);
+    END
+    """,
+    """
+    CREATE TRIGGER todos_fts_delete AFTER DELETE ON todos BEGIN
+        INSERT INTO todos_fts(todos_fts, rowid, title, description, user_id)
+        VALUES ('delete', old.id, old.title, old.description, old.user_id);
+    END
+    """,
+    """
+    CREATE TRIGGER todos_fts_update AFTER UPDATE OF title, description, user_id ON todos BEGIN
+        INSERT INTO todos_fts(todos_fts, rowid, title, description, user_id)
+        VALUES ('delete', old.id, old.title, old.description, old.user_id);
+        INSERT INTO todos_fts(rowid, title, description, user_id)
+        VALUES (new.id, new.title, new.description, new.user_id);
+    END
+    """,
+)
+
+for statement in TODOS_FTS_DDL:
+    event.listen(Todo.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+
+event.listen(Todo.__table__, "after_drop", DDL("DROP TABLE IF EXISTS todos_fts").execute_if(dialect="sqlite"))
+
+
+# Contadores por usuário e estado em `todo_stats`, mantidos por triggers na
+# mesma transação de qualquer escrita em `todos` (inclusive as em lote).
+TODO_STATS_DDL = (
+    """
+    CREATE TRIGGER todo_stats_insert AFTER INSERT ON todos BEGIN
+        INSERT INTO todo_stats(user_id, state, count) VALUES (new.user_id, new.state, 1)
+        ON CONFLICT(user_id, state) DO UPDATE SET count = count + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER todo_stats_delete AFTER DELETE ON todos BEGIN
+        UPDATE todo_stats SET count = count - 1
+        WHERE user_id = old.user_id AND state = old.state;
+    END
+    """,
+    """
+    CREATE TRIGGER todo_stats_update AFTER UPDATE OF state, user_id ON todos
+    WHEN old.state IS NOT new.state OR old.user_id IS NOT new.user_id BEGIN
+        UPDATE todo_stats SET count = count - 1
+        WHERE user_id = old.user_id AND state = old.state;
+        INSERT INTO todo_stats(user_id, state, count) VALUES (new.user_id, new.state, 1)
+        ON CONFLICT(user_id, state) DO UPDATE SET count = count + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER todo_stats_user_delete AFTER DELETE ON users BEGIN
+        DELETE FROM todo_stats WHERE user_id = old.id;
+    END
+    """,
+)
+
+for statement in TODO_STATS_DDL:
+    event.listen(table_registry.metadata, "after_create", DDL(statement).execute_if(dialect="sqlite"))
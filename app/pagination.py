@@ -0,0 +1,53 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as Base64Error
+from http import HTTPStatus
+
+from fastapi import HTTPException
+
+from app.schemas import FilterPage
+
+
+def encode_cursor(last_id: int):
+    return urlsafe_b64encode(json.dumps({ "id": last_id }).encode()).decode()
+
+
+def decode_cursor(cursor: str):
+    try:
+        last_id = json.loads(urlsafe_b64decode(cursor.encode()))["id"]
+    except (Base64Error, ValueError, TypeError, KeyError):
+        raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail="Invalid cursor")
+
+    if not isinstance(last_id, int):
+        raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail="Invalid cursor")
+
+    return last_id
+
+
+def paginate(query, column, page: FilterPage):
+    """
+    Aplica a paginação de `page` ordenando pela coluna indexada `column`.
+
+    Com `cursor` a busca continua a partir do último id visto (keyset), então
+    qualquer página custa o mesmo que a primeira. Sem ele vale o `offset`.
+    Uma linha a mais é pedida para saber se existe próxima página.
+    """
+    if page.cursor:
+        query = query.where(column > decode_cursor(page.cursor))
+    else:
+        query = query.offset(page.offset)
+
+    return query.order_by(column).limit(page.limit + 1)
+
+
+def page_items(rows, page: FilterPage):
+    """Corta a linha extra de `paginate` e devolve `(itens, next_cursor)`."""
+    rows = list(rows)
+
+    if len(rows) > page.limit:
+        rows = rows[:page.limit]
+
+        # Com `limit=0` não há último item para o cursor.
+        return rows, encode_cursor(rows[-1].id) if rows else None
+
+    return rows, None
@@ -0,0 +1,104 @@
+import cProfile
+import marshal
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import parse_qs
+
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_QUERY_PARAM = "profile"
+
+
+def wants_profile(scope) -> bool:
+    for name, value in scope["headers"]:
+        if name == PROFILE_HEADER:
+            return value not in (b"", b"0", b"false")
+
+    query = parse_qs(scope["query_string"].decode("latin-1"))
+
+    return query.get(PROFILE_QUERY_PARAM, ["0"])[-1] not in ("", "0", "false")
+
+
+def profile_filename(scope) -> str:
+    path = scope["path"].strip("/").replace("/", "_") or "root"
+    timestamp = datetime.now().strftime("%Y%m%dT%H%M%S%f")
+
+    return f"{timestamp}-{scope['method']}-{path}.prof"
+
+
+def dump_stats(profiler: cProfile.Profile) -> bytes:
+    """Mesmo conteúdo de `Profile.dump_stats`, abrível com pstats ou snakeviz."""
+    profiler.create_stats()
+
+    return marshal.dumps(profiler.stats)
+
+
+class ProfilingMiddleware:
+    """
+    Roda a requisição inteira sob o cProfile, quando pedido pelo header
+    `X-Profile: 1` ou por `?profile=1`. Como envolve a aplicação toda, a
+    resolução das dependências (`get_session`, `get_current_user`) entra no
+    perfil junto com a rota.
+
+    Com `profile_dir` o perfil é salvo em um arquivo `.prof` e o nome vai no
+    header `X-Profile-File`; a resposta segue normal. Sem diretório, a
+    resposta é trocada pelo próprio perfil, como anexo, e o status original
+    vai em `X-Profile-Status`.
+
+    O cProfile mede a thread toda, então outras requisições concorrentes
+    também aparecem no perfil e só um perfil roda por vez. Só é montado
+    quando `PROFILING_ENABLED` está ligado; fora disso não custa nada.
+    """
+
+    def __init__(self, app, profile_dir: str | None = None):
+        self.app = app
+        self.profile_dir = Path(profile_dir) if profile_dir else None
+        self.active = False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self.active or not wants_profile(scope):
+            return await self.app(scope, receive, send)
+
+        filename = profile_filename(scope)
+        status = 500
+        profiler = cProfile.Profile()
+
+        async def send_wrapper(message):
+            nonlocal status
+
+            if message["type"] == "http.response.start":
+                status = message["status"]
+
+                if self.profile_dir:
+                    message = { **message, "headers": [*message["headers"], (b"x-profile-file", filename.encode())] }
+
+            if self.profile_dir:
+                await send(message)
+
+        self.active = True
+        profiler.enable()
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profiler.disable()
+            self.active = False
+
+        profile = dump_stats(profiler)
+
+        if self.profile_dir:
+            self.profile_dir.mkdir(parents=True, exist_ok=True)
+            (self.profile_dir / filename).write_bytes(profile)
+            return
+
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", b"application/octet-stream"),
+                (b"content-length", str(len(profile)).encode()),
+                (b"content-disposition", f'attachment; filename="{filename}"'.encode()),
+                (b"x-profile-status", str(status).encode()),
+            ],
+        })
+        await send({ "type": "http.response.body", "body": profile })
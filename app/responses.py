@@ -0,0 +1,86 @@
+from dataclasses import fields
+from typing import Any
+
+from fastapi._compat import ModelField
+from fastapi.datastructures import DefaultPlaceholder
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+from pydantic_core import to_json
+
+
+class JSONBytes(bytes):
+    """Corpo de resposta já serializado em JSON pelo `response_model`."""
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse que serializa com o `to_json` do pydantic-core (Rust).
+
+    Conteúdo que já chega como `JSONBytes` (rotas `FastJSONRoute`) vai direto
+    para o corpo; o resto é serializado com a mesma saída do `json.dumps`
+    (UTF-8, sem espaços).
+    """
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, JSONBytes):
+            return content
+
+        return to_json(content)
+
+
+class JSONBytesField(ModelField):
+    """Campo de resposta que valida e vai direto para bytes (`dump_json`)."""
+
+    def serialize(
+        self,
+        value: Any,
+        *,
+        mode: str = "json",
+        include=None,
+        exclude=None,
+        by_alias: bool = True,
+        exclude_unset: bool = False,
+        exclude_defaults: bool = False,
+        exclude_none: bool = False,
+    ):
+        return JSONBytes(self._type_adapter.dump_json(
+            value,
+            include=include,
+            exclude=exclude,
+            by_alias=by_alias,
+            exclude_unset=exclude_unset,
+            exclude_defaults=exclude_defaults,
+            exclude_none=exclude_none,
+        ))
+
+
+class FastJSONRoute(APIRoute):
+    """
+    Rota que serializa o `response_model` uma vez só.
+
+    O FastAPI valida o retorno, faz `dump_python(mode="json")` e a resposta
+    percorre esse dict de novo para gerar o JSON. Aqui o campo de resposta
+    devolve os bytes do `dump_json` do próprio pydantic-core, que o
+    `FastJSONResponse` repassa sem mexer. Status, headers do `Response`
+    injetado e background tasks seguem pelo caminho normal do FastAPI.
+    """
+
+    def get_route_handler(self):
+        response_class = self.response_class
+
+        if isinstance(response_class, DefaultPlaceholder):
+            response_class = response_class.value
+
+        field = self.secure_cloned_response_field
+
+        if (
+            field is not None
+            and not isinstance(field, JSONBytesField)
+            and isinstance(response_class, type)
+            and issubclass(response_class, FastJSONResponse)
+        ):
+            self.secure_cloned_response_field = JSONBytesField(
+                **{ item.name: getattr(field, item.name) for item in fields(field) }
+            )
+
+        return super().get_route_handler()
@@ -1,37 +1,59 @@
 from http import HTTPStatus
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
 from fastapi.security import OAuth2PasswordRequestForm
 
 from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_session
+from app.database import get_read_session
 from app.models import User
-from app.schemas import Token
-from app.security import create_access_token, get_current_user, verify_password
+from app.responses import FastJSONRoute
+from app.schemas import Token, UserPublic
+from app.security import (
+    create_access_token,
+    get_current_user,
+    hash_pool,
+    password_needs_rehash,
+    rehash_password,
+    verify_password,
+)
 
 
-router = APIRouter(prefix="/auth", tags=["Auth"])
+router = APIRouter(prefix="/auth", tags=["Auth"], route_class=FastJSONRoute)
 
 
 @router.post("/token", response_model=Token)
-def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), session: Session = Depends(get_session)):
-    user = session.scalar(select(User).where(User.email == form_data.username))
+async def login_for_access_token(
+    background_tasks: BackgroundTasks,
+    form_data: OAuth2PasswordRequestForm = Depends(),
+    read_session: AsyncSession = Depends(get_read_session)
+):
+    # A busca vai pelo pool de leitura e o commit (vazio) encerra a transação,
+    # devolvendo a conexão antes do Argon2. O rehash abre a própria sessão de
+    # escrita, só depois do novo hash pronto.
+    result = await read_session.execute(
+        select(User.id, User.email, User.password).where(User.email == form_data.username)
+    )
+    user = result.one_or_none()
+    await read_session.commit()
 
     if not user:
         raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail="Email not exists")
     
-    if not verify_password(form_data.password, user.password):
+    if not await hash_pool.run(verify_password, form_data.password, user.password):
         raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail="Password incorrect")
     
+    if password_needs_rehash(user.password):
+        background_tasks.add_task(rehash_password, user.id, user.password, form_data.password)
+
     access_token = create_access_token(data={ "sub": user.email })
 
     return { "access_token": access_token, "token_type": "bearer" }
 
 
 @router.post("/refresh_token", response_model=Token)
-def refresh_access_token(user: User = Depends(get_current_user)):
+async def refresh_access_token(user: UserPublic = Depends(get_current_user)):
     new_access_token = create_access_token(data={ "sub": user.email })
 
     return { "access_token": new_access_token, "token_type": "bearer" }
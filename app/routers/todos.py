@@ -1,25 +1,115 @@
+import csv
+import io
+import itertools
+import json
 from http import HTTPStatus
-from typing import Annotated
-from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import Annotated, Literal
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Request, Response, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
 
-from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy import delete, func, insert, literal_column, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_session
-from app.models import Todo, User
-from app.schemas import FilterTodo, Message, TodoList, TodoPublic, TodoSchema, TodoUpdate
+from app.database import get_read_session, get_session
+from app.etag import etag_matches, make_etag, not_modified
+from app.models import Todo, TodoStat, todos_fts
+from app.pagination import page_items, paginate
+from app.responses import FastJSONRoute
+from app.schemas import (
+    BulkResult,
+    FilterTodo,
+    FilterTodoBulk,
+    FilterTodoExport,
+    ImportResult,
+    Message,
+    TodoList,
+    TodoPublic,
+    TodoSchema,
+    TodoStats,
+    TodoUpdate,
+    UserPublic,
+)
 from app.security import get_current_user
+from app.settings import Settings
 
 
-router = APIRouter(prefix="/todos", tags=["Todos"])
+router = APIRouter(prefix="/todos", tags=["Todos"], route_class=FastJSONRoute)
+settings = Settings()
 
-SessionEnd = Annotated[Session, Depends(get_session)]
-CurrentUser = Annotated[User, Depends(get_current_user)]
+SessionEnd = Annotated[AsyncSession, Depends(get_session)]
+ReadSession = Annotated[AsyncSession, Depends(get_read_session)]
+CurrentUser = Annotated[UserPublic, Depends(get_current_user)]
 
+# O limite do lote entra na validação: o tamanho da lista é conferido antes
+# dos itens, então um lote grande demais é recusado (422) sem validar nada.
+TodoBatch = Annotated[list[TodoSchema], Body(max_length=settings.TODO_BATCH_MAX_SIZE)]
+
+# Colunas do TodoPublic: listagens e exportação leem só isso, como linhas,
+# sem montar entidades do ORM.
+TODO_PUBLIC_COLUMNS = (Todo.id, Todo.title, Todo.description, Todo.state, Todo.created_at, Todo.updated_at)
+
+
+def search_expression(user_id: int, q: str):
+    """
+    Monta a expressão MATCH do FTS5 a partir do texto livre do usuário.
+
+    Cada palavra vira um termo entre aspas (sem operadores do FTS5) e a busca
+    fica restrita aos todos do usuário pela coluna `user_id` do índice.
+    """
+    terms = " ".join('"{}"'.format(term.replace('"', '""')) for term in q.split())
+
+    return f'user_id : "{user_id}" AND {{title description}} : ({terms})'
+
+
+def require_filter(conditions: list):
+    """
+    Operações em lote precisam de algum filtro além do dono. A checagem é
+    feita nas condições montadas, já que filtros vazios (`?title=`) são
+    descartados por `todo_conditions`.
+    """
+    if len(conditions) == 1:
+        raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail="At least one filter is required")
+
+
+def todo_conditions(user_id: int, todo_filter: FilterTodoBulk):
+    conditions = [Todo.user_id == user_id]
+
+    if todo_filter.ids is not None:
+        conditions.append(Todo.id.in_(todo_filter.ids))
+
+    search = todo_filter.q and todo_filter.q.strip()
+
+    if search:
+        conditions.append(Todo.id.in_(
+            select(todos_fts.c.rowid).where(literal_column("todos_fts").match(search_expression(user_id, search)))
+        ))
+
+    if todo_filter.title:
+        conditions.append(Todo.title.contains(todo_filter.title))
+
+    if todo_filter.description:
+        conditions.append(Todo.description.contains(todo_filter.description))
+
+    if todo_filter.state:
+        conditions.append(Todo.state == todo_filter.state)
+
+    return conditions
 
-@router.get("/", response_model=TodoList)
-def list_todos(session: SessionEnd, user: CurrentUser, todo_filter: Annotated[FilterTodo, Query()]):
-    query = select(Todo).where(Todo.user_id == user.id)
+
+def is_search(todo_filter: FilterTodo):
+    return bool(todo_filter.q and todo_filter.q.strip())
+
+
+def list_todos_query(user_id: int, todo_filter: FilterTodo):
+    """Colunas do `TodoPublic` dos todos do usuário, com os filtros aplicados."""
+    query = select(*TODO_PUBLIC_COLUMNS).where(Todo.user_id == user_id)
+
+    if is_search(todo_filter):
+        query = query.join(todos_fts, todos_fts.c.rowid == Todo.id).filter(
+            literal_column("todos_fts").match(search_expression(user_id, todo_filter.q.strip()))
+        )
 
     if todo_filter.title:
         query = query.filter(Todo.title.contains(todo_filter.title))
@@ -30,13 +120,125 @@ def list_todos(session: SessionEnd, user: CurrentUser, todo_filter: Annotated[Fi
     if todo_filter.state:
         query = query.filter(Todo.state == todo_filter.state)
 
-    todos = session.scalars(query.offset(todo_filter.offset).limit(todo_filter.limit)).all()
+    return query
+
+
+def fingerprint_query(query):
+    """
+    Impressão digital do conjunto filtrado: muda com inserções, remoções e
+    alterações, sem precisar carregar nem serializar os todos. Os filtros
+    e a paginação entram no ETag para que cada página tenha o seu.
+    """
+    return query.with_only_columns(func.count(Todo.id), func.max(Todo.id), func.max(Todo.updated_at))
+
+
+def list_todos_page(query, todo_filter: FilterTodo):
+    if is_search(todo_filter):
+        # Resultados por relevância: paginação só por offset, sem cursor.
+        return query.order_by(todos_fts.c.rank, Todo.id).offset(todo_filter.offset).limit(todo_filter.limit)
+
+    return paginate(query, Todo.id, todo_filter)
+
+
+def bulk_update_statement(conditions: list, values: dict):
+    return update(Todo).where(*conditions).values(**values).execution_options(synchronize_session=False)
+
+
+def bulk_delete_statement(conditions: list):
+    return delete(Todo).where(*conditions).execution_options(synchronize_session=False)
+
+
+@router.get("/", response_model=TodoList)
+async def list_todos(
+    session: ReadSession,
+    user: CurrentUser,
+    todo_filter: Annotated[FilterTodo, Query()],
+    request: Request,
+    response: Response,
+):
+    query = list_todos_query(user.id, todo_filter)
+
+    fingerprint = await session.execute(fingerprint_query(query))
+    etag = make_etag(user.id, *fingerprint.one(), *todo_filter.model_dump().values())
+
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    response.headers["ETag"] = etag
+
+    todos = await session.execute(list_todos_page(query, todo_filter))
+
+    if is_search(todo_filter):
+        todos, next_cursor = todos.all(), None
+    else:
+        todos, next_cursor = page_items(todos, todo_filter)
+
+    return { "todos": [todo._asdict() for todo in todos], "next_cursor": next_cursor }
+
+
+@router.get("/stats", response_model=TodoStats)
+async def todo_stats(session: ReadSession, user: CurrentUser):
+    result = await session.execute(
+        select(TodoStat.state, TodoStat.count).where(TodoStat.user_id == user.id)
+    )
+    stats = { state.value: count for state, count in result }
+
+    return { **stats, "total": sum(stats.values()) }
+
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def export_chunk(rows, export_format: str):
+    if export_format == "ndjson":
+        return "".join(TodoPublic(**row._mapping).model_dump_json() + "\n" for row in rows)
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows(
+        (row.id, row.title, row.description, row.state.value, row.created_at.isoformat(), row.updated_at.isoformat())
+        for row in rows
+    )
 
-    return { "todos": todos}
+    return buffer.getvalue()
+
+
+async def stream_export(session: AsyncSession, query, export_format: str):
+    """
+    Gera o arquivo de exportação em blocos de `EXPORT_CHUNK_SIZE` linhas.
+
+    As linhas vêm de um cursor no servidor, então a memória não cresce com o
+    número de todos. A sessão da dependência já foi fechada quando o corpo
+    começa a ser enviado; ela é reaberta aqui e fechada ao final.
+    """
+    try:
+        if export_format == "csv":
+            yield "id,title,description,state,created_at,updated_at\r\n"
+
+        result = await session.stream(query.execution_options(yield_per=settings.EXPORT_CHUNK_SIZE))
+
+        async for rows in result.partitions():
+            yield export_chunk(rows, export_format)
+    finally:
+        await session.close()
+
+
+@router.get("/export")
+async def export_todos(session: ReadSession, user: CurrentUser, todo_filter: Annotated[FilterTodoExport, Query()]):
+    query = select(*TODO_PUBLIC_COLUMNS).where(*todo_conditions(user.id, todo_filter)).order_by(Todo.id)
+
+    return StreamingResponse(
+        stream_export(session, query, todo_filter.format),
+        media_type=EXPORT_MEDIA_TYPES[todo_filter.format],
+        headers={ "Content-Disposition": f'attachment; filename="todos.{todo_filter.format}"' }
+    )
 
 
 @router.post("/", response_model=TodoPublic)
-def create_todo(todo: TodoSchema, user: CurrentUser, session: SessionEnd):
+async def create_todo(todo: TodoSchema, user: CurrentUser, session: SessionEnd):
     db_todo = Todo(
         title=todo.title,
         description=todo.description,
@@ -45,37 +247,168 @@ def create_todo(todo: TodoSchema, user: CurrentUser, session: SessionEnd):
     )
 
     session.add(db_todo)
-    session.commit()
-    session.refresh(db_todo)
+    await session.commit()
 
     return db_todo
 
 
+@router.post("/batch", status_code=HTTPStatus.CREATED, response_model=TodoList)
+async def create_todos_batch(todos: TodoBatch, user: CurrentUser, session: SessionEnd):
+    if not todos:
+        return { "todos": [] }
+
+    db_todos = await session.scalars(
+        insert(Todo).returning(Todo, sort_by_parameter_order=True),
+        [{ **todo.model_dump(), "user_id": user.id } for todo in todos]
+    )
+    db_todos = db_todos.all()
+
+    await session.commit()
+
+    return { "todos": db_todos }
+
+
+def import_rows(file, import_format: str):
+    """
+    Lê o arquivo enviado linha a linha, devolvendo `(linha, dados)`.
+
+    Linhas que nem chegam a ser um registro (JSON inválido) vêm com o
+    `ValueError` no lugar dos dados.
+    """
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", errors="replace", newline="")
+
+    if import_format == "csv":
+        reader = csv.DictReader(text)
+
+        for row in reader:
+            yield reader.line_num, row
+
+        return
+
+    for line_number, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+
+        try:
+            yield line_number, json.loads(line)
+        except ValueError as exc:
+            yield line_number, exc
+
+
+def row_error_detail(error: Exception):
+    if isinstance(error, ValidationError):
+        return "; ".join(
+            f"{'.'.join(map(str, e['loc'])) or 'row'}: {e['msg']}" for e in error.errors()
+        )
+
+    return "Invalid JSON"
+
+
+def parse_chunk(rows, user_id: int, size: int):
+    """
+    Lê e valida até `size` linhas de `rows`, devolvendo `(todos, erros, fim)`.
+
+    Roda no threadpool: a leitura do arquivo temporário e a validação do
+    pydantic não bloqueiam o event loop enquanto o upload é processado.
+    """
+    chunk = []
+    errors = []
+    read = 0
+
+    for line, data in itertools.islice(rows, size):
+        read += 1
+
+        try:
+            if isinstance(data, Exception):
+                raise data
+
+            chunk.append({ **TodoSchema.model_validate(data).model_dump(), "user_id": user_id })
+        except ValueError as exc:
+            errors.append({ "line": line, "detail": row_error_detail(exc) })
+
+    return chunk, errors, read < size
+
+
+@router.post("/import", response_model=ImportResult)
+async def import_todos(
+    file: UploadFile,
+    session: SessionEnd,
+    user: CurrentUser,
+    import_format: Annotated[Literal["ndjson", "csv"], Query(alias="format")] = "ndjson",
+):
+    imported = 0
+    failed = 0
+    errors = []
+    rows = import_rows(file.file, import_format)
+    done = False
+
+    while not done:
+        chunk, row_errors, done = await run_in_threadpool(parse_chunk, rows, user.id, settings.IMPORT_CHUNK_SIZE)
+
+        failed += len(row_errors)
+        errors.extend(row_errors[:settings.IMPORT_MAX_ERRORS - len(errors)])
+
+        if chunk:
+            await session.execute(insert(Todo), chunk)
+            await session.commit()
+            imported += len(chunk)
+
+    return { "imported": imported, "failed": failed, "errors": errors }
+
+
+@router.patch("/", response_model=BulkResult)
+async def patch_todos(session: SessionEnd, user: CurrentUser, todo_filter: Annotated[FilterTodoBulk, Query()], todo: TodoUpdate):
+    conditions = todo_conditions(user.id, todo_filter)
+    require_filter(conditions)
+    values = todo.model_dump(exclude_unset=True)
+
+    if not values:
+        return { "count": 0 }
+
+    result = await session.execute(bulk_update_statement(conditions, values))
+    await session.commit()
+
+    return { "count": result.rowcount }
+
+
+@router.delete("/", response_model=BulkResult)
+async def delete_todos(session: SessionEnd, user: CurrentUser, todo_filter: Annotated[FilterTodoBulk, Query()]):
+    conditions = todo_conditions(user.id, todo_filter)
+    require_filter(conditions)
+
+    result = await session.execute(bulk_delete_statement(conditions))
+    await session.commit()
+
+    return { "count": result.rowcount }
+
+
 @router.patch("/{id}", response_model=TodoPublic)
-def patch_todo(id: int, session: SessionEnd, user: CurrentUser, todo: TodoUpdate):
-    db_todo = session.scalar(select(Todo).where(Todo.user_id == user.id, Todo.id == id))
+async def patch_todo(id: int, session: SessionEnd, user: CurrentUser, todo: TodoUpdate):
+    values = todo.model_dump(exclude_unset=True)
+
+    if values:
+        db_todo = await session.scalar(
+            update(Todo).where(Todo.user_id == user.id, Todo.id == id).values(**values).returning(Todo)
+        )
+    else:
+        db_todo = await session.scalar(select(Todo).where(Todo.user_id == user.id, Todo.id == id))
 
     if not db_todo:
         raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail="Task not found.")
-    
-    for key, value in todo.model_dump(exclude_unset=True).items():
-        setattr(db_todo, key, value)
 
-    session.add(db_todo)
-    session.commit()
-    session.refresh(db_todo)
+    await session.commit()
 
     return db_todo
 
 
 @router.delete("/{id}", response_model=Message)
-def delete_todo(id: int, session: SessionEnd, user: CurrentUser):
-    db_todo = session.scalar(select(Todo).where(Todo.user_id == user.id, Todo.id == id))
+async def delete_todo(id: int, session: SessionEnd, user: CurrentUser):
+    db_todo = await session.scalar(select(Todo).where(Todo.user_id == user.id, Todo.id == id))
 
     if not db_todo:
         raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail="Task not found.")
     
-    session.delete(db_todo)
-    session.commit()
+    await session.delete(db_todo)
+    await session.commit()
 
     return { "message": "Task has been deleted successfully" }
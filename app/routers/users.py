@@ -1,91 +1,176 @@
 from http import HTTPStatus
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 
-from sqlalchemy import select
+from sqlalchemy import exists, select
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_session
+from app.cache import TTLCache
+from app.database import get_read_session, get_session
+from app.etag import etag_matches, make_etag, not_modified
 from app.models import User
+from app.responses import FastJSONRoute
+from app.pagination import page_items, paginate
 from app.schemas import Message, UserList, UserPublic, UserSchema, FilterPage
-from app.security import get_current_user, get_password_hash
+from app.security import get_current_user, get_password_hash, hash_pool, user_cache
+from app.settings import Settings
 
 
-router = APIRouter(prefix="/users", tags=["Users"])
+router = APIRouter(prefix="/users", tags=["Users"], route_class=FastJSONRoute)
+settings = Settings()
 
-SessionEnd = Annotated[Session, Depends(get_session)]
-CurrentUser = Annotated[User, Depends(get_current_user)]
+# Usernames/emails que já vimos em uso, para recusar cadastros repetidos sem
+# gastar um hash Argon2. É por processo, então serve só como dica: um acerto
+# é confirmado no banco antes de recusar (ver `is_taken`).
+taken_cache = TTLCache(maxsize=settings.TAKEN_CACHE_MAXSIZE, ttl=settings.TAKEN_CACHE_TTL_SECONDS)
+
+SessionEnd = Annotated[AsyncSession, Depends(get_session)]
+ReadSession = Annotated[AsyncSession, Depends(get_read_session)]
+CurrentUser = Annotated[UserPublic, Depends(get_current_user)]
+
+
+def read_users_query(page: FilterPage):
+    return paginate(select(User.id, User.username, User.email), User.id, page)
+
+
+def read_user_query(id: int):
+    return select(User.id, User.username, User.email, User.updated_at).where(User.id == id)
 
 
 @router.get("/", response_model=UserList)
-def read_users(session: SessionEnd, filter_users: Annotated[FilterPage, Query()]):
-    users = session.scalars(select(User).offset(filter_users.offset).limit(filter_users.limit)).all()
-    return {"users": users}
+async def read_users(session: ReadSession, filter_users: Annotated[FilterPage, Query()]):
+    users = await session.execute(read_users_query(filter_users))
+    users, next_cursor = page_items(users, filter_users)
+
+    return {"users": users, "next_cursor": next_cursor}
 
 
 @router.get("/{id}", response_model=UserPublic)
-def read_user(id: int, session: SessionEnd):
-    db_user = session.scalar(select(User).where(User.id == id))
+async def read_user(id: int, session: ReadSession, request: Request, response: Response):
+    result = await session.execute(read_user_query(id))
+    db_user = result.one_or_none()
 
     if not db_user:
         raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail="User not found")
     
+    etag = make_etag(db_user.id, db_user.updated_at)
+
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    response.headers["ETag"] = etag
+
     return db_user
 
 
+async def is_taken(session: AsyncSession, field: str, value: str):
+    """
+    Confirma com um `SELECT EXISTS` (coluna única, indexada) um acerto do
+    `taken_cache`. Em vários workers, um nome liberado por `delete_user` em
+    um deles continua no cache dos outros; nesse caso a entrada é removida.
+    """
+    if not taken_cache.get((field, value)):
+        return False
+
+    if await session.scalar(select(exists().where(getattr(User, field) == value))):
+        return True
+
+    taken_cache.pop((field, value))
+
+    return False
+
+
+def mark_taken(username: str, email: str):
+    taken_cache.set(("username", username), True)
+    taken_cache.set(("email", email), True)
+
+
+def release_taken(username: str, email: str):
+    taken_cache.pop(("username", username))
+    taken_cache.pop(("email", email))
+
+
 @router.post("/", status_code=HTTPStatus.CREATED, response_model=UserPublic)
-def create_user(user: UserSchema, session: SessionEnd):
-    db_user = session.scalar(
-        select(User).where(
-            (User.username == user.username) | (User.email == user.email)
-        )
-    )
+async def create_user(user: UserSchema, session: SessionEnd, read_session: ReadSession):
+    if await is_taken(read_session, "username", user.username):
+        raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail="Username already exists")
+
+    if await is_taken(read_session, "email", user.email):
+        raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail="Email already exists")
+
+    # Encerra a leitura antes do Argon2, devolvendo a conexão ao pool.
+    await read_session.commit()
 
-    if db_user:
-        if db_user.username == user.username:
-            raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail="Username already exists")
-        elif db_user.email == user.email:
-            raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail="Email already exists")
-        
     db_user = User(
         username=user.username, 
-        password=get_password_hash(user.password), 
+        password=await hash_pool.run(get_password_hash, user.password), 
         email=user.email
     )
 
     session.add(db_user)
-    session.commit()
-    session.refresh(db_user)
+
+    try:
+        await session.commit()
+    except IntegrityError as exc:
+        await session.rollback()
+
+        if "username" in str(exc.orig):
+            taken_cache.set(("username", user.username), True)
+            raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail="Username already exists")
+
+        taken_cache.set(("email", user.email), True)
+        raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail="Email already exists")
+
+    mark_taken(db_user.username, db_user.email)
 
     return db_user
 
 
 @router.put("/{id}", response_model=UserPublic)
-def update_user(id: int, user: UserSchema, session: SessionEnd, current_user: CurrentUser):
+async def update_user(id: int, user: UserSchema, session: SessionEnd, current_user: CurrentUser):
     if current_user.id != id:
         raise HTTPException(status_code=HTTPStatus.FORBIDDEN, detail="Not enough permissions")
-    
+
+    # Hash antes de abrir a transação, para não segurar uma conexão de
+    # escrita enquanto o Argon2 roda.
+    hashed_password = await hash_pool.run(get_password_hash, user.password)
+    db_user = await session.get(User, id)
+
+    if not db_user:
+        raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail="User not found")
+
     try:
-        current_user.username = user.username
-        current_user.password = get_password_hash(user.password)
-        current_user.email = user.email
+        db_user.username = user.username
+        db_user.password = hashed_password
+        db_user.email = user.email
+
+        await session.commit()
 
-        session.commit()
-        session.refresh(current_user)
+        user_cache.pop(current_user.email)
+        release_taken(current_user.username, current_user.email)
+        mark_taken(db_user.username, db_user.email)
 
-        return current_user
+        return db_user
     except IntegrityError:
         raise HTTPException(status_code=HTTPStatus.CONFLICT, detail="Username or Email already exists")
 
 
 @router.delete("/{id}", response_model=Message)
-def delete_user(id: int, session: SessionEnd, current_user: CurrentUser):
+async def delete_user(id: int, session: SessionEnd, current_user: CurrentUser):
     if current_user.id != id:
         raise HTTPException(status_code=HTTPStatus.FORBIDDEN, detail="Not enough permissions")
     
-    session.delete(current_user)
-    session.commit()
+    db_user = await session.get(User, id)
+
+    if not db_user:
+        raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail="User not found")
+
+    await session.delete(db_user)
+    await session.commit()
+
+    user_cache.pop(current_user.email)
+    release_taken(current_user.username, current_user.email)
 
     return { "message": "User deleted" }
@@ -1,4 +1,5 @@
 from datetime import datetime
+from typing import Literal
 from pydantic import BaseModel, ConfigDict, EmailStr
 
 from app.models import TodoState
@@ -24,6 +25,7 @@ class UserPublic(BaseModel):
 
 class UserList(BaseModel):
     users: list[UserPublic]
+    next_cursor: str | None = None
 
 
 class Token(BaseModel):
@@ -38,6 +40,7 @@ class TokenData(BaseModel):
 class FilterPage(BaseModel):
     offset: int = 0
     limit: int = 100
+    cursor: str | None = None
     
 
 class TodoSchema(BaseModel):
@@ -54,6 +57,7 @@ class TodoPublic(TodoSchema):
 
 class TodoList(BaseModel):
     todos: list[TodoPublic]
+    next_cursor: str | None = None
 
 
 class TodoUpdate(BaseModel):
@@ -63,7 +67,43 @@ class TodoUpdate(BaseModel):
     
 
 class FilterTodo(FilterPage):
+    q: str | None = None
     title: str | None = None
     description: str | None = None
     state: TodoState | None = None
-    
\ No newline at end of file
+    
+
+class FilterTodoBulk(BaseModel):
+    ids: list[int] | None = None
+    q: str | None = None
+    title: str | None = None
+    description: str | None = None
+    state: TodoState | None = None
+
+
+class FilterTodoExport(FilterTodoBulk):
+    format: Literal["ndjson", "csv"] = "ndjson"
+
+
+class BulkResult(BaseModel):
+    count: int
+
+
+class ImportRowError(BaseModel):
+    line: int
+    detail: str
+
+
+class ImportResult(BaseModel):
+    imported: int
+    failed: int
+    errors: list[ImportRowError]
+
+
+class TodoStats(BaseModel):
+    draft: int = 0
+    todo: int = 0
+    doing: int = 0
+    done: int = 0
+    trash: int = 0
+    total: int = 0
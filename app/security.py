@@ -1,4 +1,5 @@
 from datetime import datetime, timedelta
+from time import time
 
 from http import HTTPStatus
 from zoneinfo import ZoneInfo
@@ -9,18 +10,30 @@ from fastapi.security import OAuth2PasswordBearer
 from jwt import encode, decode, DecodeError, ExpiredSignatureError
 
 from pwdlib import PasswordHash
+from pwdlib.hashers.argon2 import Argon2Hasher
 
-from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_session
+from app.cache import TTLCache
+from app.database import engine, get_read_session
+from app.hashing import HashWorkerPool
 from app.models import User
-from app.schemas import TokenData
+from app.schemas import TokenData, UserPublic
 from app.settings import Settings
 
 
 settings = Settings()
-pwd_context = PasswordHash.recommended()
+pwd_context = PasswordHash((
+    Argon2Hasher(
+        time_cost=settings.ARGON2_TIME_COST,
+        memory_cost=settings.ARGON2_MEMORY_COST,
+        parallelism=settings.ARGON2_PARALLELISM
+    ),
+))
+hash_pool = HashWorkerPool(max_workers=settings.HASH_WORKERS, max_pending=settings.HASH_MAX_PENDING)
+user_cache = TTLCache(maxsize=settings.USER_CACHE_MAXSIZE, ttl=settings.USER_CACHE_TTL_SECONDS)
+token_cache = TTLCache(maxsize=settings.TOKEN_CACHE_MAXSIZE, ttl=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60)
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token")
 
@@ -42,7 +55,66 @@ def verify_password(plain_password: str, hashed_password: str):
     return pwd_context.verify(plain_password, hashed_password)
 
 
-def get_current_user(session: Session = Depends(get_session), token: str = Depends(oauth2_scheme)):
+def password_needs_rehash(hashed_password: str):
+    return pwd_context.current_hasher.check_needs_rehash(hashed_password)
+
+
+async def rehash_password(user_id: int, hashed_password: str, plain_password: str):
+    """
+    Refaz o hash com os parâmetros atuais do Argon2.
+
+    Pensado para rodar como background task após o login: abre a própria
+    sessão, já que a da requisição é fechada antes das background tasks. Só
+    atualiza se o hash guardado ainda for o antigo, para não sobrescrever uma
+    troca de senha feita nesse meio tempo.
+    """
+    try:
+        new_hash = await hash_pool.run(get_password_hash, plain_password)
+    except HTTPException:
+        return
+
+    async with AsyncSession(engine) as session:
+        await session.execute(
+            update(User)
+            .where(User.id == user_id, User.password == hashed_password)
+            .values(password=new_hash)
+        )
+        await session.commit()
+
+
+def decode_access_token(token: str):
+    """
+    Decodifica o token JWT, reaproveitando as claims já verificadas.
+
+    Tokens válidos ficam em cache até o seu `exp`, então a assinatura só é
+    conferida na primeira vez que o token aparece.
+    """
+    cached = token_cache.get(token)
+
+    if cached:
+        token_data, expire = cached
+
+        if expire <= time():
+            token_cache.pop(token)
+            raise ExpiredSignatureError("Signature has expired")
+
+        return token_data
+
+    payload = decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    token_data = TokenData(username=payload.get("sub"))
+    expire = payload.get("exp")
+
+    if token_data.username and expire:
+        token_cache.set(token, (token_data, expire), ttl=expire - time())
+
+    return token_data
+
+
+def user_by_email_query(email: str):
+    return select(User).where(User.email == email)
+
+
+async def get_current_user(session: AsyncSession = Depends(get_read_session), token: str = Depends(oauth2_scheme)):
     credentials_exception = HTTPException(
         status_code=HTTPStatus.UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -56,23 +128,26 @@ def get_current_user(session: Session = Depends(get_session), token: str = Depen
     )
 
     try:
-        payload = decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        username: str = payload.get("sub")
-
-        if not username:
-            raise credentials_exception
-        
-        token_data = TokenData(username=username)
+        token_data = decode_access_token(token)
 
     except DecodeError:
         raise credentials_exception
     
     except ExpiredSignatureError:
         raise credentials_expired_exception
-    
-    user = session.scalar(select(User).where(User.email == token_data.username))
 
-    if not user:
+    if not token_data.username:
         raise credentials_exception
     
+    user = user_cache.get(token_data.username)
+
+    if not user:
+        db_user = await session.scalar(user_by_email_query(token_data.username))
+
+        if not db_user:
+            raise credentials_exception
+
+        user = UserPublic.model_validate(db_user)
+        user_cache.set(token_data.username, user)
+
     return user
@@ -1,3 +1,7 @@
+import os
+from typing import Literal
+
+from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -8,4 +12,45 @@ class Settings(BaseSettings):
     SECRET_KEY: str
     ALGORITHM: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int
-    
\ No newline at end of file
+
+    DATABASE_READ_URL: str | None = None
+
+    DB_POOL_SIZE: int = 2
+    DB_MAX_OVERFLOW: int = 2
+    DB_POOL_TIMEOUT: float = 30
+    DB_READ_POOL_SIZE: int = Field(default_factory=lambda: os.cpu_count() or 4)
+    DB_READ_MAX_OVERFLOW: int = 10
+
+    SQLITE_JOURNAL_MODE: Literal["DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF"] = "WAL"
+    SQLITE_SYNCHRONOUS: Literal["OFF", "NORMAL", "FULL", "EXTRA"] = "NORMAL"
+    SQLITE_CACHE_SIZE: int = -65536
+    SQLITE_MMAP_SIZE: int = 268435456
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_TEMP_STORE: Literal["DEFAULT", "FILE", "MEMORY"] = "MEMORY"
+    
+    USER_CACHE_MAXSIZE: int = 1024
+    USER_CACHE_TTL_SECONDS: int = 60
+    # Por processo e preenchido só após um cadastro repetido: o primeiro
+    # repetido de cada worker (ou após o TTL) ainda paga o hash, e acertos
+    # são confirmados no banco antes de recusar.
+    TAKEN_CACHE_MAXSIZE: int = 10000
+    TAKEN_CACHE_TTL_SECONDS: int = 300
+    TOKEN_CACHE_MAXSIZE: int = 4096
+
+    HASH_WORKERS: int = 2
+    HASH_MAX_PENDING: int = 32
+
+    ARGON2_TIME_COST: int = 3
+    ARGON2_MEMORY_COST: int = 65536
+    ARGON2_PARALLELISM: int = 4
+
+    TODO_BATCH_MAX_SIZE: int = 1000
+    EXPORT_CHUNK_SIZE: int = 1000
+    IMPORT_CHUNK_SIZE: int = 1000
+    IMPORT_MAX_ERRORS: int = 100
+
+    SLOW_QUERY_THRESHOLD_MS: float | None = 200
+    SLOW_QUERY_EXPLAIN: bool = False
+
+    PROFILING_ENABLED: bool = False
+    PROFILE_DIR: str | None = None
@@ -0,0 +1,91 @@
+import logging
+
+from app.metrics import add_query_observer, request_stats
+
+
+logger = logging.getLogger("app.slow_queries")
+
+REDACTED = "***"
+SENSITIVE_PARAMS = ("password",)
+EXPLAINABLE = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH")
+
+
+def is_sensitive(name) -> bool:
+    return any(sensitive in str(name).lower() for sensitive in SENSITIVE_PARAMS)
+
+
+def redact(parameters, names):
+    """
+    Troca por `***` os valores de parâmetros sensíveis (`password`, `password_1`...).
+
+    No SQLite os parâmetros chegam posicionais; os nomes vêm da ordem guardada
+    pelo comando compilado (`positiontup`).
+    """
+    if isinstance(parameters, dict):
+        return { key: REDACTED if is_sensitive(key) else value for key, value in parameters.items() }
+
+    if names is None:
+        return parameters
+
+    return tuple(REDACTED if is_sensitive(name) else value for name, value in zip(names, parameters))
+
+
+def query_plan(conn, statement: str, parameters):
+    explain = conn.connection.dbapi_connection.cursor()
+
+    try:
+        explain.execute(f"EXPLAIN QUERY PLAN {statement}", parameters)
+        return "; ".join(row[-1] for row in explain.fetchall())
+    except Exception as exc:  # o log nunca pode derrubar a consulta
+        return f"unavailable ({exc})"
+    finally:
+        explain.close()
+
+
+def instrument_slow_queries(engine, threshold_ms: float, explain: bool = False):
+    """
+    Registra no logger `app.slow_queries` os comandos que passarem de
+    `threshold_ms`: SQL, parâmetros (sem senhas), duração, rota da requisição
+    e, com `explain`, o `EXPLAIN QUERY PLAN` (só no SQLite).
+    """
+    sync_engine = getattr(engine, "sync_engine", engine)
+    threshold = threshold_ms / 1000
+    explain = explain and sync_engine.dialect.name == "sqlite"
+
+    # O tempo vem da medição das métricas, sem um segundo par de listeners.
+    def log_slow_query(conn, statement, parameters, context, executemany, elapsed):
+        if elapsed < threshold:
+            return
+
+        compiled = getattr(context, "compiled", None)
+        names = getattr(compiled, "positiontup", None)
+
+        if executemany:
+            params = [redact(row, names) for row in parameters]
+        else:
+            params = redact(parameters, names)
+
+        stats = request_stats.get()
+        route = f"{stats.method} {stats.route}" if stats else None
+        plan = None
+
+        if explain and not executemany and statement.lstrip().upper().startswith(EXPLAINABLE):
+            plan = query_plan(conn, statement, parameters)
+
+        logger.warning(
+            "Slow query (%.1f ms) on %s: %s | params=%r%s",
+            elapsed * 1000,
+            route or "no request",
+            statement,
+            params,
+            f" | plan={plan}" if plan else "",
+            extra={
+                "duration_ms": elapsed * 1000,
+                "statement": statement,
+                "parameters": params,
+                "route": route,
+                "query_plan": plan,
+            },
+        )
+
+    add_query_observer(sync_engine, log_slow_query)
@@ -0,0 +1,26 @@
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Todo, TodoStat
+
+
+async def rebuild_todo_stats(session: AsyncSession, user_id: int | None = None):
+    """
+    Recalcula `todo_stats` a partir de `todos`, para corrigir divergências.
+
+    Sem `user_id` refaz a tabela inteira; a operação roda em uma transação.
+    """
+    counts = select(Todo.user_id, Todo.state, func.count()).group_by(Todo.user_id, Todo.state)
+    clear = delete(TodoStat)
+
+    if user_id is not None:
+        counts = counts.where(Todo.user_id == user_id)
+        clear = clear.where(TodoStat.user_id == user_id)
+
+    await session.execute(clear)
+    result = await session.execute(
+        insert(TodoStat).from_select([TodoStat.user_id, TodoStat.state, TodoStat.count], counts)
+    )
+    await session.commit()
+
+    return result.rowcount
@@ -0,0 +1,288 @@
+"""
+Benchmark dos endpoints pela aplicação ASGI, com bases geradas a partir de
+uma semente.
+
+Gera (uma vez, em `--data-dir`) uma base SQLite com `--size` todos usando as
+factories de `tests/conftest.py` e mede vazão e latências p50/p99 de
+`list_todos` (todas as combinações de filtros), `create_todo`, `patch_todo`,
+`login_for_access_token` e `read_users`. Cada execução roda sobre uma cópia
+da base, então as escritas não alteram a base gerada.
+
+O resultado vai para um JSON; com `--compare` os números são comparados com
+um resultado anterior e o comando sai com erro se algum cenário piorou mais
+que `--threshold`.
+
+    python -m benchmarks.bench_endpoints --size 100k
+    python -m benchmarks.bench_endpoints --size 100k --compare benchmarks/results/anterior.json
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+from time import perf_counter
+
+import factory.random
+import httpx
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.app import app
+from app.database import create_engine, get_read_session, get_session, read_only_url
+from app.models import Todo, User, table_registry
+from app.security import get_password_hash
+from app.settings import Settings
+from tests.conftest import TodoFactory, UserFactory
+
+
+SIZES = { "1k": 1_000, "100k": 100_000, "1m": 1_000_000 }
+PASSWORD = "benchmark"
+INSERT_CHUNK = 10_000
+
+# Gerar texto pelo Faker custa ~0,5 ms por todo (mais de 8 min para 1M); as
+# bases usam um conjunto de todos da factory repetido entre os usuários.
+TEMPLATE_TODOS = 10_000
+
+
+def users_for(size: int):
+    return max(10, min(1_000, size // 1_000))
+
+
+async def seed(path: Path, size: int, seed_value: int):
+    factory.random.reseed_random(seed_value)
+    UserFactory.reset_sequence(0)
+
+    engine = create_engine(Settings(), f"sqlite+aiosqlite:///{path}")
+    password = get_password_hash(PASSWORD)
+    users = users_for(size)
+    templates = [
+        { "title": todo.title, "description": todo.description, "state": todo.state }
+        for todo in TodoFactory.build_batch(min(size, TEMPLATE_TODOS))
+    ]
+
+    async with engine.begin() as conn:
+        await conn.run_sync(table_registry.metadata.create_all)
+        await conn.execute(insert(User), [
+            { "username": user.username, "email": user.email, "password": password }
+            for user in UserFactory.build_batch(users)
+        ])
+
+        for start in range(0, size, INSERT_CHUNK):
+            await conn.execute(insert(Todo), [
+                { **templates[i % len(templates)], "user_id": i % users + 1 }
+                for i in range(start, min(start + INSERT_CHUNK, size))
+            ])
+
+    await engine.dispose()
+
+
+async def dataset(data_dir: Path, size_name: str, seed_value: int):
+    path = data_dir / f"todos-{size_name}-seed{seed_value}.db"
+
+    if not path.exists():
+        data_dir.mkdir(parents=True, exist_ok=True)
+        partial = path.with_suffix(".partial")
+        partial.unlink(missing_ok=True)
+
+        start = perf_counter()
+        await seed(partial, SIZES[size_name], seed_value)
+        partial.rename(path)
+        print(f"seeded {path} in {perf_counter() - start:.1f}s")
+
+    return path
+
+
+def percentile(latencies: list[float], p: float):
+    return latencies[max(0, math.ceil(p * len(latencies)) - 1)]
+
+
+async def measure(client: httpx.AsyncClient, make_request, requests: int, concurrency: int, warmup: int = 5):
+    for i in range(warmup):
+        await make_request(client, i)
+
+    counter = itertools.count()
+    latencies = []
+    errors = 0
+
+    async def worker():
+        nonlocal errors
+
+        while (i := next(counter)) < requests:
+            start = perf_counter()
+            response = await make_request(client, warmup + i)
+            latencies.append(perf_counter() - start)
+
+            if response.is_error:
+                errors += 1
+
+    start = perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = perf_counter() - start
+
+    latencies.sort()
+
+    return {
+        "requests": requests,
+        "errors": errors,
+        "throughput_rps": round(requests / elapsed, 1),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 3),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+    }
+
+
+def scenarios(email: str, headers: dict, todo_ids: list[int], filters: dict, args):
+    def list_todos(params):
+        return lambda client, i: client.get("/todos/", params=params, headers=headers)
+
+    for size in range(len(filters) + 1):
+        for names in itertools.combinations(filters, size):
+            label = "+".join(names) or "none"
+            yield f"list_todos[{label}]", list_todos({ name: filters[name] for name in names }), args.requests
+
+    yield "create_todo", lambda client, i: client.post(
+        "/todos/", headers=headers, json={ "title": f"bench {i}", "description": "bench", "state": "todo" }
+    ), args.requests
+
+    yield "patch_todo", lambda client, i: client.patch(
+        f"/todos/{todo_ids[i % len(todo_ids)]}", headers=headers, json={ "description": f"patched {i}" }
+    ), args.requests
+
+    yield "login_for_access_token", lambda client, i: client.post(
+        "/auth/token", data={ "username": email, "password": PASSWORD }
+    ), args.login_requests
+
+    yield "read_users", lambda client, i: client.get("/users/"), args.requests
+
+
+async def run(args):
+    source = await dataset(args.data_dir, args.size, args.seed)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "bench.db"
+        shutil.copy(source, path)
+
+        settings = Settings(DATABASE_URL=f"sqlite+aiosqlite:///{path}")
+        engine = create_engine(settings)
+        read_engine = create_engine(settings, read_only_url(settings), read_only=True)
+
+        async def session_override():
+            async with AsyncSession(engine, expire_on_commit=False) as session:
+                yield session
+
+        async def read_session_override():
+            async with AsyncSession(read_engine, expire_on_commit=False) as session:
+                yield session
+
+        app.dependency_overrides[get_session] = session_override
+        app.dependency_overrides[get_read_session] = read_session_override
+
+        async with AsyncSession(engine) as session:
+            email = await session.scalar(select(User.email).where(User.id == 1))
+            todos = (await session.execute(
+                select(Todo.id, Todo.title).where(Todo.user_id == 1).order_by(Todo.id).limit(100)
+            )).all()
+
+        # Filtros tirados dos próprios dados, para que as buscas encontrem algo.
+        word = todos[0].title.split()[0]
+        filters = { "q": word, "title": word.lower()[:3], "description": "e", "state": "todo" }
+        results = {}
+
+        transport = httpx.ASGITransport(app=app)
+
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            response = await client.post("/auth/token", data={ "username": email, "password": PASSWORD })
+            headers = { "Authorization": f"Bearer {response.json()['access_token']}" }
+
+            for name, make_request, requests in scenarios(email, headers, [todo.id for todo in todos], filters, args):
+                results[name] = await measure(client, make_request, requests, args.concurrency)
+                print(
+                    f"{name:45} {results[name]['throughput_rps']:9.1f} req/s"
+                    f"   p50 {results[name]['p50_ms']:8.2f} ms   p99 {results[name]['p99_ms']:8.2f} ms"
+                )
+
+        app.dependency_overrides.clear()
+        await read_engine.dispose()
+        await engine.dispose()
+
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: dict, baseline_path: Path, threshold: float):
+    """Lista os cenários cujo p50 ou p99 piorou mais que `threshold` (fração)."""
+    baseline = json.loads(baseline_path.read_text())["results"]
+    regressions = []
+
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+
+        for metric in ("p50_ms", "p99_ms"):
+            before, after = baseline[name][metric], result[metric]
+
+            if before and after > before * (1 + threshold):
+                regressions.append(f"{name} {metric}: {before:.2f} -> {after:.2f} ms (+{after / before - 1:.0%})")
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", choices=SIZES, default="1k")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--login-requests", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--data-dir", type=Path, default=Path(".benchmarks"))
+    parser.add_argument("--output", type=Path)
+    parser.add_argument("--compare", type=Path)
+    parser.add_argument("--threshold", type=float, default=0.10)
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    timestamp = datetime.now(timezone.utc)
+    output = args.output or Path("benchmarks/results") / f"endpoints-{args.size}-{timestamp:%Y%m%dT%H%M%S}.json"
+
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps({
+        "meta": {
+            "timestamp": timestamp.isoformat(),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "size": args.size,
+            "seed": args.seed,
+            "concurrency": args.concurrency,
+        },
+        "results": results,
+    }, indent=2) + "\n")
+    print(f"results written to {output}")
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.threshold)
+
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Benchmark do POST /todos/import.
+
+Gera um arquivo NDJSON com `--rows` linhas, envia pela aplicação ASGI
+(banco SQLite temporário) e mostra a vazão em linhas por segundo.
+
+    python -m benchmarks.bench_import --rows 100000
+"""
+import argparse
+import asyncio
+import json
+import tempfile
+from pathlib import Path
+from time import perf_counter
+
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.app import app
+from app.database import get_session
+from app.models import table_registry
+from app.schemas import UserPublic
+from app.security import get_current_user
+
+
+def write_ndjson(path: Path, rows: int):
+    with path.open("w") as file:
+        for i in range(rows):
+            file.write(json.dumps({ "title": f"todo {i}", "description": "imported", "state": "todo" }) + "\n")
+
+
+async def create_tables(engine):
+    async with engine.begin() as conn:
+        await conn.run_sync(table_registry.metadata.create_all)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{directory}/bench.db")
+        asyncio.run(create_tables(engine))
+
+        async def get_session_override():
+            async with AsyncSession(engine, expire_on_commit=False) as session:
+                yield session
+
+        app.dependency_overrides[get_session] = get_session_override
+        app.dependency_overrides[get_current_user] = lambda: UserPublic(id=1, username="bench", email="bench@example.com")
+
+        source = Path(directory) / "todos.ndjson"
+        write_ndjson(source, args.rows)
+
+        with TestClient(app) as client, source.open("rb") as file:
+            start = perf_counter()
+            response = client.post("/todos/import", files={ "file": ("todos.ndjson", file, "application/x-ndjson") })
+            elapsed = perf_counter() - start
+
+        app.dependency_overrides.clear()
+
+    result = response.json()
+    print(f"rows: {result['imported']} imported, {result['failed']} failed")
+    print(f"time: {elapsed:.2f} s")
+    print(f"rate: {result['imported'] / elapsed:,.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Benchmark da listagem de todos: entidades do ORM x projeção de colunas.
+
+Monta uma página de `--items` todos das duas formas (como o GET /todos fazia
+antes e como faz agora) e mede latência e memória alocada por página.
+
+    python -m benchmarks.bench_list_projection --items 100
+"""
+import argparse
+import asyncio
+import tracemalloc
+from time import perf_counter
+
+from sqlalchemy import StaticPool, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.models import Todo, User, table_registry
+from app.routers.todos import TODO_PUBLIC_COLUMNS
+from app.schemas import TodoList
+
+
+ROUNDS = 200
+
+
+async def entities_page(session: AsyncSession, limit: int):
+    todos = await session.scalars(select(Todo).where(Todo.user_id == 1).order_by(Todo.id).limit(limit))
+    page = TodoList.model_validate({ "todos": todos.all() }, from_attributes=True)
+    session.expunge_all()
+
+    return page
+
+
+async def columns_page(session: AsyncSession, limit: int):
+    todos = await session.execute(
+        select(*TODO_PUBLIC_COLUMNS).where(Todo.user_id == 1).order_by(Todo.id).limit(limit)
+    )
+
+    return TodoList.model_validate({ "todos": [todo._asdict() for todo in todos] })
+
+
+async def measure(session: AsyncSession, build_page, limit: int):
+    await build_page(session, limit)
+
+    start = perf_counter()
+    for _ in range(ROUNDS):
+        await build_page(session, limit)
+    elapsed = (perf_counter() - start) / ROUNDS
+
+    tracemalloc.start()
+    await build_page(session, limit)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return elapsed * 1e6, peak / 1024
+
+
+async def run(items: int):
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", poolclass=StaticPool)
+
+    async with engine.begin() as conn:
+        await conn.run_sync(table_registry.metadata.create_all)
+        await conn.execute(insert(User), [{ "username": "bench", "email": "bench@example.com", "password": "x" }])
+        await conn.execute(insert(Todo), [
+            { "title": f"todo {i}", "description": "bench", "state": "todo", "user_id": 1 }
+            for i in range(items)
+        ])
+
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        for name, build_page in (("ORM entities", entities_page), ("column rows", columns_page)):
+            latency, peak = await measure(session, build_page, items)
+            print(f"{name:13} {latency:8.1f} us/page   peak {peak:7.1f} KiB")
+
+    await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=100)
+    args = parser.parse_args()
+
+    asyncio.run(run(args.items))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Benchmark da serialização de respostas do GET /todos.
+
+Usa uma página de `--items` todos e o mesmo caminho do FastAPI
+(`serialize_response` + classe de resposta), comparando:
+
+- `JSONResponse`: validação, `dump_python(mode="json")` e `json.dumps`;
+- `FastJSONResponse`: o mesmo dump em dict, renderizado com `to_json`;
+- `FastJSONRoute`: validação e `dump_json` direto para bytes.
+
+    python -m benchmarks.bench_response --items 100
+"""
+import argparse
+import asyncio
+from datetime import datetime
+from time import perf_counter
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+
+from app.app import app
+from app.responses import FastJSONResponse
+
+
+NUMBER = 2_000
+
+
+def build_page(items: int):
+    now = datetime(2024, 1, 1, 12, 30)
+
+    return {
+        "todos": [
+            {
+                "id": i,
+                "title": f"Tarefa número {i}",
+                "description": "Descrição com acentuação e um texto um pouco maior " * 2,
+                "state": "todo",
+                "created_at": now,
+                "updated_at": now,
+            }
+            for i in range(items)
+        ],
+        "next_cursor": None,
+    }
+
+
+async def measure(field, response_class, page):
+    best = float("inf")
+
+    for _ in range(5):
+        start = perf_counter()
+
+        for _ in range(NUMBER):
+            content = await serialize_response(field=field, response_content=page, is_coroutine=True)
+            response = response_class(content)
+
+        best = min(best, perf_counter() - start)
+
+    return best / NUMBER * 1e6, response.body
+
+
+async def run(items: int):
+    route = next(
+        route for route in app.routes
+        if getattr(route, "path", None) == "/todos/" and "GET" in getattr(route, "methods", ())
+    )
+    page = build_page(items)
+    cases = (
+        ("JSONResponse", route.response_field, JSONResponse),
+        ("FastJSONResponse", route.response_field, FastJSONResponse),
+        ("FastJSONRoute", route.secure_cloned_response_field, FastJSONResponse),
+    )
+    bodies = set()
+
+    for name, field, response_class in cases:
+        elapsed, body = await measure(field, response_class, page)
+        bodies.add(body)
+        print(f"{name:18} validate+serialize+render: {elapsed:8.1f} us")
+
+    assert len(bodies) == 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=100)
+    args = parser.parse_args()
+
+    asyncio.run(run(args.items))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Benchmark de leituras e escritas concorrentes no SQLite em arquivo.
+
+Compara o engine padrão (journal de rollback, NullPool do aiosqlite) com o
+engine de `app.database.create_engine` (WAL, PRAGMAs e pool configurados).
+Cada worker alterna entre ler uma página de todos e inserir um todo, na
+proporção dada por `--writes`.
+
+    python -m benchmarks.bench_sqlite_pragmas --workers 8 --ops 500 --writes 0.2
+"""
+import argparse
+import asyncio
+import random
+import tempfile
+from pathlib import Path
+from time import perf_counter
+
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.database import create_engine
+from app.models import Todo, User, table_registry
+from app.routers.todos import TODO_PUBLIC_COLUMNS
+from app.settings import Settings
+
+
+SEED_TODOS = 10_000
+
+
+async def worker(engine, ops: int, writes: float, seed: int):
+    rng = random.Random(seed)
+
+    for _ in range(ops):
+        async with AsyncSession(engine) as session:
+            if rng.random() < writes:
+                await session.execute(insert(Todo), [
+                    { "title": "bench", "description": "bench", "state": "todo", "user_id": 1 }
+                ])
+                await session.commit()
+            else:
+                await session.execute(
+                    select(*TODO_PUBLIC_COLUMNS).where(Todo.user_id == 1).order_by(Todo.id.desc()).limit(20)
+                )
+
+
+async def measure(engine, workers: int, ops: int, writes: float):
+    async with engine.begin() as conn:
+        await conn.run_sync(table_registry.metadata.create_all)
+        await conn.execute(insert(User), [{ "username": "bench", "email": "bench@example.com", "password": "x" }])
+        await conn.execute(insert(Todo), [
+            { "title": f"todo {i}", "description": "bench", "state": "todo", "user_id": 1 }
+            for i in range(SEED_TODOS)
+        ])
+
+    start = perf_counter()
+    await asyncio.gather(*(worker(engine, ops, writes, seed) for seed in range(workers)))
+    elapsed = perf_counter() - start
+
+    await engine.dispose()
+
+    return workers * ops / elapsed
+
+
+async def run(workers: int, ops: int, writes: float):
+    with tempfile.TemporaryDirectory() as directory:
+        engines = (
+            ("default", create_async_engine(f"sqlite+aiosqlite:///{Path(directory) / 'default.db'}")),
+            ("tuned", create_engine(Settings(), f"sqlite+aiosqlite:///{Path(directory) / 'tuned.db'}")),
+        )
+
+        for name, engine in engines:
+            throughput = await measure(engine, workers, ops, writes)
+            print(f"{name:8} {throughput:9.0f} ops/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--ops", type=int, default=500)
+    parser.add_argument("--writes", type=float, default=0.2)
+    args = parser.parse_args()
+
+    asyncio.run(run(args.workers, args.ops, args.writes))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""
+Micro-benchmark do cache de tokens JWT.
+
+Compara o custo de decodificar e validar o token a cada requisição com o
+caminho que reaproveita as claims já verificadas.
+
+    python -m benchmarks.bench_token_cache
+"""
+from timeit import repeat
+
+from jwt import decode
+
+from app.schemas import TokenData
+from app.security import create_access_token, decode_access_token, settings, token_cache
+
+
+NUMBER = 20_000
+
+
+def decode_without_cache(token: str):
+    payload = decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    return TokenData(username=payload.get("sub"))
+
+
+def main():
+    token = create_access_token(data={ "sub": "bench@example.com" })
+    token_cache.clear()
+    decode_access_token(token)
+
+    uncached = min(repeat(lambda: decode_without_cache(token), number=NUMBER, repeat=5)) / NUMBER
+    cached = min(repeat(lambda: decode_access_token(token), number=NUMBER, repeat=5)) / NUMBER
+
+    print(f"jwt.decode + TokenData: {uncached * 1e6:8.2f} us/req")
+    print(f"token_cache hit:        {cached * 1e6:8.2f} us/req")
+    print(f"savings:                {(uncached - cached) * 1e6:8.2f} us/req ({uncached / cached:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Escolhe parâmetros do Argon2 para atingir uma latência alvo de verificação.
+
+Mantém `parallelism` e parte do `memory_cost` informados, aumentando o
+`time_cost` até a verificação levar pelo menos `--target-ms`. Se nem com
+`time_cost=1` couber no alvo, a memória é reduzida pela metade.
+
+    python -m benchmarks.tune_argon2 --target-ms 250
+"""
+import argparse
+import os
+from statistics import median
+from time import perf_counter
+
+from pwdlib.hashers.argon2 import Argon2Hasher
+
+from app.settings import Settings
+
+
+PASSWORD = "correct horse battery staple"
+MIN_MEMORY_COST = 8 * 1024
+
+
+def measure_verify(time_cost: int, memory_cost: int, parallelism: int, rounds: int):
+    hasher = Argon2Hasher(time_cost=time_cost, memory_cost=memory_cost, parallelism=parallelism)
+    hashed = hasher.hash(PASSWORD)
+    timings = []
+
+    for _ in range(rounds):
+        start = perf_counter()
+        hasher.verify(PASSWORD, hashed)
+        timings.append(perf_counter() - start)
+
+    return median(timings) * 1000
+
+
+def tune(target_ms: float, memory_cost: int, parallelism: int, rounds: int, max_time_cost: int = 20):
+    while True:
+        elapsed = measure_verify(1, memory_cost, parallelism, rounds)
+        print(f"time_cost=1 memory_cost={memory_cost} parallelism={parallelism}: {elapsed:.1f} ms")
+
+        if elapsed <= target_ms or memory_cost // 2 < MIN_MEMORY_COST:
+            break
+
+        memory_cost //= 2
+
+    time_cost = 1
+
+    while elapsed < target_ms and time_cost < max_time_cost:
+        time_cost += 1
+        elapsed = measure_verify(time_cost, memory_cost, parallelism, rounds)
+        print(f"time_cost={time_cost} memory_cost={memory_cost} parallelism={parallelism}: {elapsed:.1f} ms")
+
+    return time_cost, memory_cost, elapsed
+
+
+def main():
+    settings = Settings()
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target-ms", type=float, default=250, help="latência alvo de verificação")
+    parser.add_argument("--memory-cost", type=int, default=settings.ARGON2_MEMORY_COST, help="memória inicial em KiB")
+    parser.add_argument("--parallelism", type=int, default=settings.ARGON2_PARALLELISM)
+    parser.add_argument("--rounds", type=int, default=5, help="medições por combinação")
+    args = parser.parse_args()
+
+    print(f"CPUs: {os.cpu_count()}")
+    time_cost, memory_cost, elapsed = tune(args.target_ms, args.memory_cost, args.parallelism, args.rounds)
+
+    print(f"\n# verify ~{elapsed:.1f} ms (alvo {args.target_ms:.0f} ms)")
+    print(f"ARGON2_TIME_COST={time_cost}")
+    print(f"ARGON2_MEMORY_COST={memory_cost}")
+    print(f"ARGON2_PARALLELISM={args.parallelism}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""create todos fts index
+
+Revision ID: c3a9e41f7b20
+Revises: 8b6f0db58d81
+Create Date: 2026-10-18 19:02:11.418203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3a9e41f7b20'
+down_revision: Union[str, None] = '8b6f0db58d81'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("""
+        CREATE VIRTUAL TABLE todos_fts USING fts5(
+            title, description, user_id,
+            content='todos', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+        )
+    """)
+    op.execute("""
+        CREATE TRIGGER todos_fts_insert AFTER INSERT ON todos BEGIN
+            INSERT INTO todos_fts(rowid, title, description, user_id)
+            VALUES (new.id, new.title, new.description, new.user_id);
+        END
+    """)
+    op.execute("""
+        CREATE TRIGGER todos_fts_delete AFTER DELETE ON todos BEGIN
+            INSERT INTO todos_fts(todos_fts, rowid, title, description, user_id)
+            VALUES ('delete', old.id, old.title, old.description, old.user_id);
+        END
+    """)
+    op.execute("""
+        CREATE TRIGGER todos_fts_update AFTER UPDATE OF title, description, user_id ON todos BEGIN
+            INSERT INTO todos_fts(todos_fts, rowid, title, description, user_id)
+            VALUES ('delete', old.id, old.title, old.description, old.user_id);
+            INSERT INTO todos_fts(rowid, title, description, user_id)
+            VALUES (new.id, new.title, new.description, new.user_id);
+        END
+    """)
+    op.execute("INSERT INTO todos_fts(todos_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS todos_fts_update")
+    op.execute("DROP TRIGGER IF EXISTS todos_fts_delete")
+    op.execute("DROP TRIGGER IF EXISTS todos_fts_insert")
+    op.execute("DROP TABLE IF EXISTS todos_fts")
@@ -1,5 +1,7 @@
 import pytest
+import pytest_asyncio
 import factory
+import factory.fuzzy
 
 from contextlib import contextmanager
 
@@ -8,13 +10,14 @@ from datetime import datetime
 from fastapi.testclient import TestClient
 
 from app.app import app
-from app.database import get_session
-from app.models import User, table_registry
+from app.database import get_read_session, get_session
+from app.routers.users import taken_cache
+from app.models import Todo, TodoState, User, table_registry
 
-from sqlalchemy import StaticPool, create_engine, event
-from sqlalchemy.orm import Session
+from sqlalchemy import StaticPool, event
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 
-from app.security import get_password_hash
+from app.security import get_password_hash, token_cache, user_cache
 
 
 @pytest.fixture
@@ -24,24 +27,33 @@ def client(session):
     
     with TestClient(app) as client:
         app.dependency_overrides[get_session] = get_session_override
+        app.dependency_overrides[get_read_session] = get_session_override
         yield client
 
     app.dependency_overrides.clear()
+    user_cache.clear()
+    token_cache.clear()
+    taken_cache.clear()
 
 
-@pytest.fixture
-def session():
-    engine = create_engine(
-        "sqlite:///memory:",
+@pytest_asyncio.fixture
+async def session():
+    engine = create_async_engine(
+        "sqlite+aiosqlite:///:memory:",
         connect_args={ "check_same_thread": False },
         poolclass=StaticPool
     )
-    table_registry.metadata.create_all(engine)
 
-    with Session(engine) as session:
+    async with engine.begin() as conn:
+        await conn.run_sync(table_registry.metadata.create_all)
+
+    async with AsyncSession(engine, expire_on_commit=False) as session:
         yield session
 
-    table_registry.metadata.drop_all(engine)
+    async with engine.begin() as conn:
+        await conn.run_sync(table_registry.metadata.drop_all)
+
+    await engine.dispose()
 
 
 @contextmanager
@@ -65,28 +77,28 @@ def mock_db_time():
     return _mock_db_time
 
 
-@pytest.fixture
-def user(session):
+@pytest_asyncio.fixture
+async def user(session):
     password = "testtest"
     user = UserFactory(password=get_password_hash(password))
 
     session.add(user)
-    session.commit()
-    session.refresh(user)
+    await session.commit()
+    await session.refresh(user)
 
     user.clean_password = password
 
     return user
 
 
-@pytest.fixture
-def other_user(session):
+@pytest_asyncio.fixture
+async def other_user(session):
     password = "testtest"
     user = UserFactory(password=get_password_hash(password))
 
     session.add(user)
-    session.commit()
-    session.refresh(user)
+    await session.commit()
+    await session.refresh(user)
 
     user.clean_password = password
 
@@ -113,3 +125,13 @@ class UserFactory(factory.Factory):
     username = factory.Sequence(lambda n: f"test{n}")
     email = factory.LazyAttribute(lambda obj: f"{obj.username}@test.com")
     password = factory.LazyAttribute(lambda obj: f"{obj.username}@example.com")
+
+
+class TodoFactory(factory.Factory):
+    class Meta:
+        model = Todo
+
+    title = factory.Faker("text")
+    description = factory.Faker("text")
+    state = factory.fuzzy.FuzzyChoice(TodoState)
+    user_id = 1
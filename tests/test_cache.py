@@ -0,0 +1,51 @@
+from freezegun import freeze_time
+
+from app.cache import TTLCache
+
+
+def test_cache_hit_and_miss():
+    cache = TTLCache(maxsize=2, ttl=60)
+
+    assert cache.get("a") is None
+
+    cache.set("a", 1)
+
+    assert cache.get("a") == 1
+    assert cache.stats() == { "size": 1, "maxsize": 2, "hits": 1, "misses": 1 }
+
+
+def test_cache_evicts_least_recently_used():
+    cache = TTLCache(maxsize=2, ttl=60)
+
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_cache_entry_expires_after_ttl():
+    cache = TTLCache(maxsize=2, ttl=60)
+
+    with freeze_time("2024-01-01 12:00:00") as frozen:
+        cache.set("a", 1)
+        frozen.tick(61)
+
+        assert cache.get("a") is None
+        assert len(cache) == 0
+
+
+def test_cache_pop_and_disabled():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.pop("a")
+
+    assert cache.get("a") is None
+
+    disabled = TTLCache(maxsize=0, ttl=60)
+    disabled.set("a", 1)
+
+    assert disabled.get("a") is None
@@ -0,0 +1,43 @@
+import pytest
+from sqlalchemy import func, select, text
+
+from app.datagen import generate, parse_distribution
+from app.models import Todo, TodoStat, TodoState, User
+
+
+def test_parse_distribution():
+    assert parse_distribution("todo=3, done=1") == ([TodoState.todo, TodoState.done], [3.0, 1.0])
+    assert parse_distribution(None) == (list(TodoState), [1] * len(TodoState))
+
+    with pytest.raises(ValueError):
+        parse_distribution("todo=0")
+
+    with pytest.raises(ValueError):
+        parse_distribution("unknown=1")
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("defer_indexes", [True, False])
+async def test_generate_users_and_todos(session, defer_indexes):
+    users, todos, _ = await generate(
+        session.bind, 3, 5, parse_distribution("doing=1,done=1"),
+        batch_size=4, seed=1, defer_indexes=defer_indexes, progress=lambda message: None
+    )
+
+    assert (users, todos) == (3, 15)
+    assert await session.scalar(select(func.count()).select_from(User)) == 3
+    assert await session.scalar(select(func.count(func.distinct(User.password)))) == 1
+    assert set(await session.scalars(select(Todo.state).distinct())) <= { TodoState.doing, TodoState.done }
+
+    stats = await session.execute(select(TodoStat.state, func.sum(TodoStat.count)).group_by(TodoStat.state))
+    todo_counts = await session.execute(select(Todo.state, func.count()).group_by(Todo.state))
+    assert dict(stats.all()) == dict(todo_counts.all())
+
+    word = (await session.scalar(select(Todo.title).limit(1))).split()[0]
+    matches = await session.scalar(text("SELECT count(*) FROM todos_fts WHERE todos_fts MATCH :q"), { "q": f'"{word}"' })
+    assert matches >= 1
+
+    # Os triggers voltam ao normal depois da carga.
+    session.add(Todo(title="x", description="y", state=TodoState.draft, user_id=1))
+    await session.commit()
+    assert await session.scalar(select(TodoStat.count).where(TodoStat.state == TodoState.draft)) == 1
@@ -1,17 +1,25 @@
 from dataclasses import asdict
 
-from sqlalchemy import select
+import pytest
+from sqlalchemy import select, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import selectinload
 
+from app.database import async_url, create_engine, read_only_url
 from app.models import Todo, User
+from app.settings import Settings
 
 
-def test_create_user(session, mock_db_time):
+@pytest.mark.asyncio
+async def test_create_user(session, mock_db_time):
     with mock_db_time(model=User) as time:
         new_user = User(username="alice", password="secret", email="teste@test")
         session.add(new_user)
-        session.commit()
+        await session.commit()
 
-    user = session.scalar(select(User).where(User.username == "alice"))
+    user = await session.scalar(
+        select(User).options(selectinload(User.todos)).where(User.username == "alice")
+    )
 
     assert asdict(user) == {
         "id": 1,
@@ -24,7 +32,8 @@ def test_create_user(session, mock_db_time):
     }
 
 
-def test_create_todo(session, user: User):
+@pytest.mark.asyncio
+async def test_create_todo(session, user: User):
     todo = Todo(
         title="Teste Todo",
         description="Teste Desc",
@@ -33,9 +42,83 @@ def test_create_todo(session, user: User):
     )
 
     session.add(todo)
-    session.commit()
-    session.refresh(todo)
+    await session.commit()
+    await session.refresh(todo)
 
-    user = session.scalar(select(User).where(User.id == user.id))
+    user = await session.scalar(
+        select(User).options(selectinload(User.todos)).where(User.id == user.id)
+    )
 
     assert todo in user.todos
+
+
+@pytest.mark.asyncio
+async def test_create_engine_applies_sqlite_pragmas(tmp_path):
+    settings = Settings(SQLITE_SYNCHRONOUS="FULL", SQLITE_BUSY_TIMEOUT_MS=1234, DB_POOL_SIZE=3)
+    engine = create_engine(settings, f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+
+    async with engine.connect() as conn:
+        journal_mode = await conn.scalar(text("PRAGMA journal_mode"))
+        synchronous = await conn.scalar(text("PRAGMA synchronous"))
+        busy_timeout = await conn.scalar(text("PRAGMA busy_timeout"))
+        temp_store = await conn.scalar(text("PRAGMA temp_store"))
+
+    await engine.dispose()
+
+    assert journal_mode == "wal"
+    assert synchronous == 2
+    assert busy_timeout == 1234
+    assert temp_store == 2
+    assert engine.pool.size() == 3
+
+
+def test_create_engine_skips_pool_options_for_memory_database():
+    engine = create_engine(Settings(), "sqlite+aiosqlite:///:memory:")
+
+    assert not hasattr(engine.pool, "size")
+
+
+def test_async_url():
+    assert str(async_url("sqlite:///database.db")) == "sqlite+aiosqlite:///database.db"
+    assert str(async_url("sqlite+aiosqlite:///database.db")) == "sqlite+aiosqlite:///database.db"
+    assert str(async_url("postgresql+asyncpg://db/app")) == "postgresql+asyncpg://db/app"
+
+    with pytest.raises(ValueError, match="async driver"):
+        async_url("postgresql://db/app")
+
+
+def test_create_engine_accepts_sync_sqlite_url(tmp_path):
+    engine = create_engine(Settings(), f"sqlite:///{tmp_path / 'test.db'}")
+
+    assert engine.url.drivername == "sqlite+aiosqlite"
+
+
+def test_read_only_url():
+    settings = Settings(DATABASE_URL="sqlite+aiosqlite:///database.db")
+
+    assert str(read_only_url(settings)) == "sqlite+aiosqlite:///file:database.db?mode=ro&uri=true"
+    assert read_only_url(Settings(DATABASE_URL="sqlite+aiosqlite:///:memory:")) is None
+    assert read_only_url(Settings(DATABASE_READ_URL="postgresql+asyncpg://replica/app")) == "postgresql+asyncpg://replica/app"
+
+
+@pytest.mark.asyncio
+async def test_read_only_engine_rejects_writes(tmp_path):
+    settings = Settings(DATABASE_URL=f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+    engine = create_engine(settings)
+    read_engine = create_engine(settings, read_only_url(settings), pool_size=8, read_only=True)
+
+    async with engine.begin() as conn:
+        await conn.execute(text("CREATE TABLE items (id INTEGER PRIMARY KEY)"))
+        await conn.execute(text("INSERT INTO items VALUES (1)"))
+
+    async with read_engine.connect() as conn:
+        assert await conn.scalar(text("SELECT count(*) FROM items")) == 1
+        assert await conn.scalar(text("PRAGMA journal_mode")) == "wal"
+
+        with pytest.raises(OperationalError, match="readonly"):
+            await conn.execute(text("INSERT INTO items VALUES (2)"))
+
+    assert read_engine.pool.size() == 8
+
+    await read_engine.dispose()
+    await engine.dispose()
@@ -0,0 +1,64 @@
+import asyncio
+import threading
+from http import HTTPStatus
+
+import pytest
+from fastapi import HTTPException
+
+from app.hashing import HashWorkerPool
+
+
+@pytest.mark.asyncio
+async def test_hash_pool_runs_and_records_latency():
+    pool = HashWorkerPool(max_workers=1, max_pending=1)
+
+    result = await pool.run(sum, [1, 2, 3])
+
+    stats = pool.stats()
+
+    assert result == 6
+    assert stats["count"] == 1
+    assert stats["pending"] == 0
+    assert stats["hash_seconds"] >= 0
+
+
+@pytest.mark.asyncio
+async def test_hash_pool_rejects_when_full():
+    pool = HashWorkerPool(max_workers=1, max_pending=0)
+
+    with pytest.raises(HTTPException) as exc:
+        await pool.run(sum, [1, 2, 3])
+
+    assert exc.value.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+    assert exc.value.headers == { "Retry-After": "1" }
+    assert pool.stats()["rejected"] == 1
+
+
+@pytest.mark.asyncio
+async def test_hash_pool_counts_cancelled_calls_until_the_hash_finishes():
+    pool = HashWorkerPool(max_workers=1, max_pending=1)
+    release = threading.Event()
+
+    task = asyncio.create_task(pool.run(release.wait))
+    await asyncio.sleep(0.01)
+    task.cancel()
+
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    # O hash ainda está rodando no executor: a vaga continua ocupada.
+    assert pool.stats()["pending"] == 1
+
+    with pytest.raises(HTTPException):
+        await pool.run(sum, [1, 2, 3])
+
+    release.set()
+
+    for _ in range(100):
+        if pool.stats()["pending"] == 0:
+            break
+
+        await asyncio.sleep(0.01)
+
+    assert pool.stats()["pending"] == 0
+    assert await pool.run(sum, [1, 2, 3]) == 6
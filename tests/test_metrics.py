@@ -0,0 +1,96 @@
+from http import HTTPStatus
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+
+from app.metrics import Counter, Histogram, db_query_errors, db_queries, instrument_engine
+
+
+def metric_value(text: str, sample: str):
+    for line in text.splitlines():
+        if line.startswith(sample + " "):
+            return float(line.rsplit(" ", 1)[1])
+
+    return None
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("latency_seconds", "Latency.", ("route",), buckets=(0.1, 1))
+
+    histogram.observe(("/a",), 0.05)
+    histogram.observe(("/a",), 0.5)
+    histogram.observe(("/a",), 5)
+
+    assert list(histogram.render()) == [
+        "# HELP latency_seconds Latency.",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{route="/a",le="0.1"} 1',
+        'latency_seconds_bucket{route="/a",le="1"} 2',
+        'latency_seconds_bucket{route="/a",le="+Inf"} 3',
+        'latency_seconds_sum{route="/a"} 5.55',
+        'latency_seconds_count{route="/a"} 3',
+    ]
+
+
+def test_counter_escapes_label_values():
+    counter = Counter("requests_total", "Requests.", ("route",))
+    counter.inc(('/a"b\\c',))
+
+    assert list(counter.render())[-1] == 'requests_total{route="/a\\"b\\\\c"} 1'
+
+
+def test_metrics_reports_requests_by_route_template(client, user, token):
+    client.get(f"/users/{user.id}")
+    client.get("/users/999")
+    client.get("/does-not-exist")
+
+    response = client.get("/metrics")
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert metric_value(response.text, 'http_requests_total{method="GET",route="/users/{id}",status="200"}') >= 1
+    assert metric_value(response.text, 'http_requests_total{method="GET",route="/users/{id}",status="404"}') >= 1
+    assert metric_value(response.text, 'http_requests_total{method="GET",route="unmatched",status="404"}') >= 1
+    assert metric_value(response.text, 'http_requests_total{method="POST",route="/auth/token",status="200"}') >= 1
+    assert metric_value(response.text, 'http_requests_in_progress{method="GET",route="/metrics"}') == 1
+    assert metric_value(response.text, 'cache_misses_total{cache="token"}') is not None
+    assert metric_value(response.text, "hash_pool_rejected_total") is not None
+
+
+def test_metrics_counts_sql_statements_per_request(client, session, token):
+    instrument_engine(session.bind)
+    count = 'http_request_db_queries_count{method="GET",route="/todos/stats"}'
+    queries = 'http_request_db_queries_sum{method="GET",route="/todos/stats"}'
+    before = client.get("/metrics").text
+
+    client.get("/todos/stats", headers={ "Authorization": f"Bearer {token}" })
+
+    after = client.get("/metrics").text
+
+    assert metric_value(after, count) == (metric_value(before, count) or 0) + 1
+    # Busca do usuário (cache vazio) + leitura de todo_stats.
+    assert metric_value(after, queries) == (metric_value(before, queries) or 0) + 2
+    assert metric_value(after, "db_queries_total") > (metric_value(before, "db_queries_total") or 0)
+
+
+@pytest.mark.asyncio
+async def test_failed_statements_are_counted_without_leaking(session, user):
+    instrument_engine(session.bind)
+    username = user.username
+    errors, queries = db_query_errors.values.get((), 0), db_queries.values.get((), 0)
+
+    for _ in range(50):
+        with pytest.raises(IntegrityError):
+            await session.execute(
+                text("INSERT INTO users (username, password, email) VALUES (:username, 'x', 'x@x.com')"),
+                { "username": username }
+            )
+        await session.rollback()
+
+    connection = await session.connection()
+    raw = await connection.get_raw_connection()
+
+    assert db_query_errors.values[()] == errors + 50
+    assert db_queries.values[()] >= queries + 50
+    assert not any(isinstance(value, list) for value in raw.info.values())
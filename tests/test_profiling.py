@@ -0,0 +1,42 @@
+import marshal
+from http import HTTPStatus
+
+from fastapi.testclient import TestClient
+
+from app.app import app
+from app.profiling import ProfilingMiddleware
+
+
+def profiled_functions(profile: bytes):
+    return { name for _, _, name in marshal.loads(profile) }
+
+
+def test_profile_returned_as_attachment(client, user, token):
+    profiled = TestClient(ProfilingMiddleware(app))
+
+    response = profiled.get("/todos/?profile=1", headers={ "Authorization": f"Bearer {token}" })
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers["x-profile-status"] == "200"
+    assert response.headers["content-disposition"].startswith('attachment; filename="')
+    assert { "get_current_user", "list_todos" } <= profiled_functions(response.content)
+
+
+def test_profile_written_to_directory(client, user, tmp_path):
+    profiled = TestClient(ProfilingMiddleware(app, profile_dir=str(tmp_path)))
+
+    response = profiled.get(f"/users/{user.id}", headers={ "X-Profile": "1" })
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()["id"] == user.id
+    assert "read_user" in profiled_functions((tmp_path / response.headers["x-profile-file"]).read_bytes())
+
+
+def test_request_without_flag_is_not_profiled(client, user, tmp_path):
+    profiled = TestClient(ProfilingMiddleware(app, profile_dir=str(tmp_path)))
+
+    response = profiled.get(f"/users/{user.id}")
+
+    assert response.status_code == HTTPStatus.OK
+    assert "x-profile-file" not in response.headers
+    assert not list(tmp_path.iterdir())
@@ -0,0 +1,73 @@
+import pytest
+
+from app.models import TodoState
+from app.pagination import encode_cursor
+from app.routers.todos import (
+    bulk_delete_statement,
+    bulk_update_statement,
+    fingerprint_query,
+    list_todos_page,
+    list_todos_query,
+    todo_conditions,
+)
+from app.routers.users import read_user_query, read_users_query
+from app.schemas import FilterPage, FilterTodo, FilterTodoBulk
+from app.security import user_by_email_query
+
+
+def list_todos_statements(name: str, todo_filter: FilterTodo):
+    query = list_todos_query(1, todo_filter)
+
+    return {
+        f"list_todos_{name}": list_todos_page(query, todo_filter),
+        f"list_todos_{name}_etag": fingerprint_query(query),
+    }
+
+
+# Os mesmos comandos que as rotas executam, montados pelos helpers delas.
+HOT_QUERIES = {
+    **list_todos_statements("default", FilterTodo()),
+    **list_todos_statements("cursor", FilterTodo(cursor=encode_cursor(10))),
+    **list_todos_statements("state", FilterTodo(state=TodoState.done)),
+    **list_todos_statements("title", FilterTodo(title="todo")),
+    **list_todos_statements("search", FilterTodo(q="todo")),
+    "bulk_update": bulk_update_statement(
+        todo_conditions(1, FilterTodoBulk(state=TodoState.done, q="todo")), { "state": TodoState.trasf }
+    ),
+    "bulk_delete": bulk_delete_statement(todo_conditions(1, FilterTodoBulk(ids=[1, 2], title="todo"))),
+    "read_users_cursor": read_users_query(FilterPage(cursor=encode_cursor(10))),
+    "read_user": read_user_query(1),
+    "user_by_email": user_by_email_query("test@test.com"),
+}
+
+# Na busca a ordem é por relevância (`rank`), que só existe depois do MATCH:
+# a ordenação em memória é esperada e a tabela FTS é lida pelo seu índice.
+ALLOWED = {
+    "list_todos_search": ("USE TEMP B-TREE FOR ORDER BY",),
+}
+
+
+async def query_plan(session, statement):
+    sql = statement.compile(
+        dialect=session.bind.dialect, compile_kwargs={ "literal_binds": True }
+    )
+    connection = await session.connection()
+    result = await connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}")
+
+    return [row.detail for row in result]
+
+
+def is_full_scan(step: str):
+    if "VIRTUAL TABLE INDEX" in step:
+        return False
+
+    return step.startswith("SCAN") or "TEMP B-TREE" in step
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("name", HOT_QUERIES)
+async def test_hot_queries_do_not_scan_tables(session, name):
+    plan = await query_plan(session, HOT_QUERIES[name])
+
+    assert plan
+    assert not [step for step in plan if is_full_scan(step) and step not in ALLOWED.get(name, ())], plan
@@ -0,0 +1,43 @@
+from datetime import datetime
+
+from fastapi.responses import JSONResponse
+
+from app.app import app
+from app.responses import FastJSONResponse, JSONBytes, JSONBytesField
+from app.schemas import TodoList
+
+
+def test_fast_json_response_matches_json_response():
+    content = {
+        "message": "Olá Mundo Novo!",
+        "todos": [{ "id": 1, "title": "ação", "done": True, "tags": None }],
+        "count": 1.5,
+    }
+
+    assert FastJSONResponse(content).body == JSONResponse(content).body
+
+
+def test_fast_json_response_serializes_datetimes():
+    response = FastJSONResponse({ "created_at": datetime(2024, 1, 1) })
+
+    assert response.body == b'{"created_at":"2024-01-01T00:00:00"}'
+
+
+def test_routes_serialize_response_model_straight_to_bytes(client, token):
+    client.post(
+        "/todos/",
+        headers={ "Authorization": f"Bearer {token}" },
+        json={ "title": "ação", "description": "descrição", "state": "draft" }
+    )
+
+    response = client.get("/todos/", headers={ "Authorization": f"Bearer {token}" })
+    route = next(route for route in app.routes if getattr(route, "path", None) == "/todos/" and "GET" in route.methods)
+    content = TodoList.model_validate(response.json()).model_dump(mode="json")
+
+    assert isinstance(route.secure_cloned_response_field, JSONBytesField)
+    assert response.content == JSONResponse(content).body
+    assert response.headers["etag"]
+
+
+def test_fast_json_response_passes_json_bytes_through():
+    assert FastJSONResponse(JSONBytes(b'{"a":1}')).body == b'{"a":1}'
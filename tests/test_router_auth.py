@@ -1,5 +1,13 @@
 from http import HTTPStatus
+
+import pytest
 from freezegun import freeze_time
+from pwdlib.hashers.argon2 import Argon2Hasher
+
+from app.app import app
+from app.database import get_session
+from app import security
+from app.security import password_needs_rehash, verify_password
 
 
 def test_get_token(client, user):
@@ -15,6 +23,22 @@ def test_get_token(client, user):
     assert "token_type" in token
 
 
+class NoWrites:
+    def __getattr__(self, name):
+        raise AssertionError(f"writer session used: {name}")
+
+
+def test_get_token_does_not_use_writer_session(client, user):
+    app.dependency_overrides[get_session] = NoWrites
+
+    response = client.post(
+        "/auth/token",
+        data={ "username": user.email, "password": user.clean_password }
+    )
+
+    assert response.status_code == HTTPStatus.OK
+
+
 def test_get_token_user_not_exists(client):
     response = client.post(
         "/auth/token",
@@ -91,4 +115,26 @@ def test_token_expired_dont_refresh(client, user):
         )
 
         assert response.status_code == HTTPStatus.UNAUTHORIZED
-        assert response.json() == { "detail": "Expired credentials" }
\ No newline at end of file
+        assert response.json() == { "detail": "Expired credentials" }
+
+
+@pytest.mark.asyncio
+async def test_login_rehashes_outdated_password(client, session, user, monkeypatch):
+    # A background task abre a própria sessão, no engine do banco de testes.
+    monkeypatch.setattr(security, "engine", session.bind)
+    app.dependency_overrides[get_session] = NoWrites
+
+    weak_hasher = Argon2Hasher(time_cost=1, memory_cost=1024, parallelism=1)
+    user.password = weak_hasher.hash(user.clean_password)
+    await session.commit()
+
+    response = client.post(
+        "/auth/token",
+        data={ "username": user.email, "password": user.clean_password }
+    )
+
+    await session.refresh(user)
+
+    assert response.status_code == HTTPStatus.OK
+    assert not password_needs_rehash(user.password)
+    assert verify_password(user.clean_password, user.password)
@@ -1,8 +1,17 @@
+import asyncio
+import csv
+import io
+import json
+from contextlib import contextmanager
 from http import HTTPStatus
 
-import factory.fuzzy
+import pytest
+from sqlalchemy import event, func, select, update
 
-from app.models import Todo, TodoState
+from app.models import Todo, TodoStat, TodoState
+from app.routers.todos import settings
+from app.stats import rebuild_todo_stats
+from tests.conftest import TodoFactory
 
 
 def test_create_todo(client, token, mock_db_time):
@@ -27,20 +36,11 @@ def test_create_todo(client, token, mock_db_time):
     }
 
 
-class TodoFactory(factory.Factory):
-    class Meta:
-        model = Todo
-
-    title = factory.Faker("text")
-    description = factory.Faker("text")
-    state = factory.fuzzy.FuzzyChoice(TodoState)
-    user_id = 1
-
-
-def test_list_todos_should_return_5_todos(session, client, user, token):
+@pytest.mark.asyncio
+async def test_list_todos_should_return_5_todos(session, client, user, token):
     expected_todos = 5
-    session.bulk_save_objects(TodoFactory.create_batch(5, user_id=user.id))
-    session.commit()
+    session.add_all(TodoFactory.create_batch(5, user_id=user.id))
+    await session.commit()
 
     response = client.get(
         "/todos/",
@@ -50,12 +50,13 @@ def test_list_todos_should_return_5_todos(session, client, user, token):
     assert len(response.json()["todos"]) == expected_todos
 
 
-def test_list_todos_pagination_should_return_2_todos(
+@pytest.mark.asyncio
+async def test_list_todos_pagination_should_return_2_todos(
     session, user, client, token
 ):
     expected_todos = 2
-    session.bulk_save_objects(TodoFactory.create_batch(5, user_id=user.id))
-    session.commit()
+    session.add_all(TodoFactory.create_batch(5, user_id=user.id))
+    await session.commit()
 
     response = client.get(
         "/todos/?offset=1&limit=2",
@@ -65,14 +66,48 @@ def test_list_todos_pagination_should_return_2_todos(
     assert len(response.json()["todos"]) == expected_todos
 
 
-def test_list_todos_filter_title_should_return_5_todos(
+@pytest.mark.asyncio
+async def test_list_todos_cursor_should_walk_all_pages(
+    session, user, client, token
+):
+    session.add_all(TodoFactory.create_batch(5, user_id=user.id))
+    await session.commit()
+
+    ids = []
+    cursor = None
+
+    while True:
+        url = "/todos/?limit=2" + (f"&cursor={cursor}" if cursor else "")
+        data = client.get(url, headers={ "Authorization": f"Bearer {token}" }).json()
+        ids += [todo["id"] for todo in data["todos"]]
+        cursor = data["next_cursor"]
+
+        if not cursor:
+            break
+
+    assert ids == [1, 2, 3, 4, 5]
+
+
+@pytest.mark.asyncio
+async def test_list_todos_limit_zero(session, user, client, token):
+    session.add_all(TodoFactory.create_batch(2, user_id=user.id))
+    await session.commit()
+
+    response = client.get("/todos/?limit=0", headers={ "Authorization": f"Bearer {token}" })
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == { "todos": [], "next_cursor": None }
+
+
+@pytest.mark.asyncio
+async def test_list_todos_filter_title_should_return_5_todos(
     session, user, client, token
 ):
     expected_todos = 5
-    session.bulk_save_objects(
+    session.add_all(
         TodoFactory.create_batch(5, user_id=user.id, title="Test todo 1")
     )
-    session.commit()
+    await session.commit()
 
     response = client.get(
         "/todos/?title=Test todo 1",
@@ -82,14 +117,15 @@ def test_list_todos_filter_title_should_return_5_todos(
     assert len(response.json()["todos"]) == expected_todos
 
 
-def test_list_todos_filter_description_should_return_5_todos(
+@pytest.mark.asyncio
+async def test_list_todos_filter_description_should_return_5_todos(
     session, user, client, token
 ):
     expected_todos = 5
-    session.bulk_save_objects(
+    session.add_all(
         TodoFactory.create_batch(5, user_id=user.id, description="description")
     )
-    session.commit()
+    await session.commit()
 
     response = client.get(
         "/todos/?description=desc",
@@ -99,14 +135,15 @@ def test_list_todos_filter_description_should_return_5_todos(
     assert len(response.json()["todos"]) == expected_todos
 
 
-def test_list_todos_filter_state_should_return_5_todos(
+@pytest.mark.asyncio
+async def test_list_todos_filter_state_should_return_5_todos(
     session, user, client, token
 ):
     expected_todos = 5
-    session.bulk_save_objects(
+    session.add_all(
         TodoFactory.create_batch(5, user_id=user.id, state=TodoState.draft)
     )
-    session.commit()
+    await session.commit()
 
     response = client.get(
         "/todos/?state=draft",
@@ -116,11 +153,12 @@ def test_list_todos_filter_state_should_return_5_todos(
     assert len(response.json()["todos"]) == expected_todos
 
 
-def test_list_todos_filter_combined_should_return_5_todos(
+@pytest.mark.asyncio
+async def test_list_todos_filter_combined_should_return_5_todos(
     session, user, client, token
 ):
     expected_todos = 5
-    session.bulk_save_objects(
+    session.add_all(
         TodoFactory.create_batch(
             5, 
             user_id=user.id, 
@@ -130,7 +168,7 @@ def test_list_todos_filter_combined_should_return_5_todos(
         )
     )
 
-    session.bulk_save_objects(
+    session.add_all(
         TodoFactory.create_batch(
             3, 
             user_id=user.id, 
@@ -139,7 +177,7 @@ def test_list_todos_filter_combined_should_return_5_todos(
             state=TodoState.todo
         )
     )
-    session.commit()
+    await session.commit()
 
     response = client.get(
         "/todos/?title=Test todo combined&description=combined&state=done",
@@ -160,11 +198,12 @@ def test_patch_todo_error(client, token):
     assert response.json() == { "detail": "Task not found." }
 
 
-def test_patch_todo(session, client, user, token):
+@pytest.mark.asyncio
+async def test_patch_todo(session, client, user, token):
     todo = TodoFactory(user_id=user.id)
 
     session.add(todo)
-    session.commit()
+    await session.commit()
 
     response = client.patch(
         f"/todos/{todo.id}",
@@ -176,11 +215,66 @@ def test_patch_todo(session, client, user, token):
     assert response.json()["title"] == "teste!"
 
 
-def test_delete_todo(session, client, user, token):
+@contextmanager
+def todo_statements(session):
+    """Coleta os comandos SQL enviados à tabela `todos` dentro do bloco."""
+    statements = []
+
+    def collect(conn, cursor, statement, parameters, context, executemany):
+        if " todos" in statement:
+            statements.append(" ".join(statement.split()))
+
+    event.listen(session.bind.sync_engine, "before_cursor_execute", collect)
+
+    try:
+        yield statements
+    finally:
+        event.remove(session.bind.sync_engine, "before_cursor_execute", collect)
+
+
+def test_create_todo_runs_a_single_insert(session, client, token):
+    with todo_statements(session) as statements:
+        response = client.post(
+            "/todos/",
+            headers={ "Authorization": f"Bearer {token}" },
+            json={ "title": "Test todo", "description": "Test todo description", "state": "draft" }
+        )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()["created_at"]
+    # Sem SELECT de refresh: o INSERT já devolve as colunas geradas.
+    assert len(statements) == 1
+    assert statements[0].startswith("INSERT INTO todos")
+    assert "RETURNING" in statements[0]
+
+
+@pytest.mark.asyncio
+async def test_patch_todo_runs_a_single_update_returning(session, client, user, token):
+    todo = TodoFactory(user_id=user.id)
+
+    session.add(todo)
+    await session.commit()
+
+    with todo_statements(session) as statements:
+        response = client.patch(
+            f"/todos/{todo.id}",
+            json={ "title": "teste!" },
+            headers={ "Authorization": f"Bearer {token}" }
+        )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()["title"] == "teste!"
+    assert len(statements) == 1
+    assert statements[0].startswith("UPDATE todos")
+    assert "RETURNING" in statements[0]
+
+
+@pytest.mark.asyncio
+async def test_delete_todo(session, client, user, token):
     todo = TodoFactory(user_id=user.id)
 
     session.add(todo)
-    session.commit()
+    await session.commit()
 
     response = client.delete(
         f"/todos/{todo.id}",
@@ -201,15 +295,16 @@ def test_delete_todo_error(client, token):
     assert response.json() == { "detail": "Task not found." }
 
 
-def test_list_todos_should_return_all_expected_fields(
+@pytest.mark.asyncio
+async def test_list_todos_should_return_all_expected_fields(
     session, client, user, token, mock_db_time
 ):
     with mock_db_time(model=Todo) as time:
         todo = TodoFactory.create(user_id=user.id)
         session.add(todo)
-        session.commit()
+        await session.commit()
 
-    session.refresh(todo)
+    await session.refresh(todo)
     response = client.get(
         "/todos/",
         headers={ "Authorization": f"Bearer {token}" }
@@ -223,3 +318,342 @@ def test_list_todos_should_return_all_expected_fields(
         "created_at": time.isoformat(),
         "updated_at": time.isoformat()
     }]
+
+
+@pytest.mark.asyncio
+async def test_list_todos_search_should_rank_matches(
+    session, user, other_user, client, token
+):
+    session.add_all([
+        TodoFactory(user_id=user.id, title="Comprar pão", description="padaria da esquina"),
+        TodoFactory(user_id=user.id, title="Lavar carro", description="comprar cera e pão"),
+        TodoFactory(user_id=user.id, title="Estudar", description="FastAPI"),
+        TodoFactory(user_id=other_user.id, title="Comprar pão", description="outro usuário"),
+    ])
+    await session.commit()
+
+    response = client.get(
+        "/todos/?q=comprar pao",
+        headers={ "Authorization": f"Bearer {token}" }
+    )
+
+    titles = [todo["title"] for todo in response.json()["todos"]]
+
+    assert response.status_code == HTTPStatus.OK
+    assert titles == ["Comprar pão", "Lavar carro"]
+
+
+@pytest.mark.asyncio
+async def test_list_todos_search_follows_updates(session, user, client, token):
+    todo = TodoFactory(user_id=user.id, title="rascunho", description="sem nada")
+    session.add(todo)
+    await session.commit()
+
+    client.patch(
+        f"/todos/{todo.id}",
+        json={ "title": "reunião" },
+        headers={ "Authorization": f"Bearer {token}" }
+    )
+
+    old = client.get("/todos/?q=rascunho", headers={ "Authorization": f"Bearer {token}" })
+    new = client.get("/todos/?q=reuniao", headers={ "Authorization": f"Bearer {token}" })
+
+    assert old.json()["todos"] == []
+    assert [t["id"] for t in new.json()["todos"]] == [todo.id]
+
+
+def test_list_todos_search_ignores_fts_syntax(client, token):
+    response = client.get(
+        '/todos/?q=" OR * NEAR(',
+        headers={ "Authorization": f"Bearer {token}" }
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()["todos"] == []
+
+
+def test_create_todos_batch(client, token):
+    payload = [
+        { "title": f"todo {i}", "description": "batch", "state": "todo" }
+        for i in range(3)
+    ]
+
+    response = client.post(
+        "/todos/batch",
+        headers={ "Authorization": f"Bearer {token}" },
+        json=payload
+    )
+
+    todos = response.json()["todos"]
+
+    assert response.status_code == HTTPStatus.CREATED
+    assert [todo["title"] for todo in todos] == ["todo 0", "todo 1", "todo 2"]
+    assert all(todo["id"] and todo["created_at"] for todo in todos)
+
+
+def test_create_todos_batch_too_large(client, token):
+    # Itens inválidos: o lote é recusado pelo tamanho, antes de validar cada um.
+    response = client.post(
+        "/todos/batch",
+        headers={ "Authorization": f"Bearer {token}" },
+        json=[{}] * (settings.TODO_BATCH_MAX_SIZE + 1)
+    )
+
+    errors = response.json()["detail"]
+
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+    assert [(error["type"], error["loc"]) for error in errors] == [("too_long", ["body"])]
+    assert errors[0]["ctx"]["max_length"] == settings.TODO_BATCH_MAX_SIZE
+
+
+@pytest.mark.asyncio
+async def test_patch_todos_bulk_by_state(session, user, other_user, client, token):
+    session.add_all(TodoFactory.create_batch(3, user_id=user.id, state=TodoState.todo))
+    session.add_all(TodoFactory.create_batch(2, user_id=user.id, state=TodoState.draft))
+    session.add_all(TodoFactory.create_batch(2, user_id=other_user.id, state=TodoState.todo))
+    await session.commit()
+
+    response = client.patch(
+        "/todos/?state=todo",
+        json={ "state": "done" },
+        headers={ "Authorization": f"Bearer {token}" }
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == { "count": 3 }
+
+    response = client.get("/todos/?state=done", headers={ "Authorization": f"Bearer {token}" })
+
+    assert len(response.json()["todos"]) == 3
+
+
+@pytest.mark.asyncio
+async def test_delete_todos_bulk_by_ids(session, user, other_user, client, token):
+    session.add_all(TodoFactory.create_batch(3, user_id=user.id))
+    session.add(TodoFactory(user_id=other_user.id))
+    await session.commit()
+
+    response = client.delete(
+        "/todos/?ids=1&ids=2&ids=4",
+        headers={ "Authorization": f"Bearer {token}" }
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == { "count": 2 }
+
+
+def test_delete_todos_bulk_requires_filter(client, token):
+    response = client.delete("/todos/", headers={ "Authorization": f"Bearer {token}" })
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json() == { "detail": "At least one filter is required" }
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("query", ["title=", "description=", "q=%20", "title=&q=%20%20"])
+async def test_bulk_rejects_empty_filters(session, user, client, token, query):
+    session.add_all(TodoFactory.create_batch(3, user_id=user.id, state=TodoState.draft))
+    await session.commit()
+
+    deleted = client.delete(f"/todos/?{query}", headers={ "Authorization": f"Bearer {token}" })
+    patched = client.patch(
+        f"/todos/?{query}",
+        headers={ "Authorization": f"Bearer {token}" },
+        json={ "state": "done" }
+    )
+
+    assert deleted.status_code == HTTPStatus.BAD_REQUEST
+    assert patched.status_code == HTTPStatus.BAD_REQUEST
+    assert await session.scalar(select(func.count()).select_from(Todo).where(Todo.state == TodoState.draft)) == 3
+
+
+@pytest.mark.asyncio
+async def test_export_todos_ndjson(session, user, other_user, client, token):
+    session.add_all(TodoFactory.create_batch(3, user_id=user.id, state=TodoState.done))
+    session.add_all(TodoFactory.create_batch(2, user_id=user.id, state=TodoState.draft))
+    session.add(TodoFactory(user_id=other_user.id, state=TodoState.done))
+    await session.commit()
+
+    response = client.get(
+        "/todos/export?state=done",
+        headers={ "Authorization": f"Bearer {token}" }
+    )
+
+    lines = [json.loads(line) for line in response.text.splitlines()]
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert [line["id"] for line in lines] == [1, 2, 3]
+    assert set(lines[0]) == { "id", "title", "description", "state", "created_at", "updated_at" }
+
+
+@pytest.mark.asyncio
+async def test_export_todos_csv(session, user, client, token):
+    session.add_all(TodoFactory.create_batch(2, user_id=user.id, state=TodoState.todo))
+    await session.commit()
+
+    response = client.get(
+        "/todos/export?format=csv",
+        headers={ "Authorization": f"Bearer {token}" }
+    )
+
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers["content-type"].startswith("text/csv")
+    assert [row["state"] for row in rows] == ["todo", "todo"]
+
+
+def test_import_todos_ndjson_reports_row_errors(client, token):
+    content = "\n".join([
+        json.dumps({ "title": "a", "description": "x", "state": "todo" }),
+        "{ not json",
+        json.dumps({ "title": "b", "description": "y", "state": "unknown" }),
+        "",
+        json.dumps({ "title": "c", "description": "z", "state": "done" }),
+    ])
+
+    response = client.post(
+        "/todos/import",
+        headers={ "Authorization": f"Bearer {token}" },
+        files={ "file": ("todos.ndjson", content, "application/x-ndjson") }
+    )
+
+    data = response.json()
+
+    assert response.status_code == HTTPStatus.OK
+    assert data["imported"] == 2
+    assert data["failed"] == 2
+    assert [error["line"] for error in data["errors"]] == [2, 3]
+    assert data["errors"][0]["detail"] == "Invalid JSON"
+    assert data["errors"][1]["detail"].startswith("state:")
+
+
+def test_import_todos_csv_in_chunks(client, token, monkeypatch):
+    monkeypatch.setattr(settings, "IMPORT_CHUNK_SIZE", 2)
+    content = "title,description,state\n" + "".join(f"t{i},d{i},draft\n" for i in range(5))
+
+    response = client.post(
+        "/todos/import?format=csv",
+        headers={ "Authorization": f"Bearer {token}" },
+        files={ "file": ("todos.csv", content, "text/csv") }
+    )
+
+    assert response.json() == { "imported": 5, "failed": 0, "errors": [] }
+
+    response = client.get("/todos/?state=draft", headers={ "Authorization": f"Bearer {token}" })
+
+    assert len(response.json()["todos"]) == 5
+
+
+def test_import_todos_parses_off_the_event_loop(client, token, monkeypatch):
+    from app.routers import todos
+
+    original = todos.import_rows
+    loops = []
+
+    def import_rows(file, import_format):
+        for row in original(file, import_format):
+            try:
+                loops.append(asyncio.get_running_loop())
+            except RuntimeError:
+                loops.append(None)
+
+            yield row
+
+    monkeypatch.setattr(todos, "import_rows", import_rows)
+    content = "".join(json.dumps({ "title": f"t{i}", "description": "d", "state": "todo" }) + "\n" for i in range(3))
+
+    response = client.post(
+        "/todos/import",
+        headers={ "Authorization": f"Bearer {token}" },
+        files={ "file": ("todos.ndjson", content, "application/x-ndjson") }
+    )
+
+    assert response.json()["imported"] == 3
+    assert loops == [None, None, None]
+
+
+@pytest.mark.asyncio
+async def test_list_todos_etag_not_modified(session, user, client, token):
+    todo = TodoFactory(user_id=user.id)
+    session.add(todo)
+    await session.commit()
+
+    headers = { "Authorization": f"Bearer {token}" }
+    etag = client.get("/todos/", headers=headers).headers["etag"]
+
+    response = client.get("/todos/", headers={ **headers, "If-None-Match": etag })
+
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    assert response.headers["etag"] == etag
+    assert response.content == b""
+
+    client.patch(f"/todos/{todo.id}", json={ "title": "changed" }, headers=headers)
+    response = client.get("/todos/", headers={ **headers, "If-None-Match": etag })
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers["etag"] != etag
+
+
+def test_list_todos_etag_changes_when_todo_is_replaced(client, token):
+    headers = { "Authorization": f"Bearer {token}" }
+    todo = { "title": "a", "description": "b", "state": "todo" }
+
+    todo_id = client.post("/todos/", json=todo, headers=headers).json()["id"]
+    etag = client.get("/todos/", headers=headers).headers["etag"]
+    client.delete(f"/todos/{todo_id}", headers=headers)
+
+    # Mesmo id (rowid reaproveitado) e mesmo segundo da anterior.
+    assert client.post("/todos/", json=todo, headers=headers).json()["id"] == todo_id
+
+    response = client.get("/todos/", headers={ **headers, "If-None-Match": etag })
+
+    assert response.status_code == HTTPStatus.OK
+
+
+@pytest.mark.asyncio
+async def test_list_todos_etag_differs_per_page(session, user, client, token):
+    session.add_all(TodoFactory.create_batch(3, user_id=user.id))
+    await session.commit()
+
+    headers = { "Authorization": f"Bearer {token}" }
+    first = client.get("/todos/?limit=2", headers=headers)
+    second = client.get("/todos/?limit=2&offset=2", headers={ **headers, "If-None-Match": first.headers["etag"] })
+
+    assert second.status_code == HTTPStatus.OK
+    assert second.headers["etag"] != first.headers["etag"]
+
+
+@pytest.mark.asyncio
+async def test_todo_stats_follow_every_write_path(session, user, other_user, client, token):
+    headers = { "Authorization": f"Bearer {token}" }
+    session.add_all(TodoFactory.create_batch(3, user_id=user.id, state=TodoState.todo))
+    session.add(TodoFactory(user_id=other_user.id, state=TodoState.todo))
+    await session.commit()
+
+    client.post("/todos/", json={ "title": "a", "description": "b", "state": "trash" }, headers=headers)
+    client.patch("/todos/1", json={ "state": "done" }, headers=headers)
+    client.patch("/todos/?ids=2", json={ "state": "doing" }, headers=headers)
+    client.delete("/todos/3", headers=headers)
+
+    response = client.get("/todos/stats", headers=headers)
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == {
+        "draft": 0, "todo": 0, "doing": 1, "done": 1, "trash": 1, "total": 3
+    }
+
+
+@pytest.mark.asyncio
+async def test_rebuild_todo_stats_repairs_drift(session, user, client, token):
+    session.add_all(TodoFactory.create_batch(2, user_id=user.id, state=TodoState.draft))
+    await session.commit()
+    await session.execute(update(TodoStat).values(count=99))
+    await session.commit()
+
+    await rebuild_todo_stats(session)
+
+    response = client.get("/todos/stats", headers={ "Authorization": f"Bearer {token}" })
+
+    assert response.json()["draft"] == 2
@@ -1,6 +1,8 @@
 from http import HTTPStatus
 
+from app.routers.users import mark_taken, taken_cache
 from app.schemas import UserPublic
+from app.security import hash_pool
 
 
 def test_create_user(client):
@@ -49,11 +51,52 @@ def test_create_user_email_alreary_exists(client, user):
     assert response.json() == { "detail": "Email already exists" }
 
 
+def test_create_user_duplicate_skips_hashing(client, user):
+    payload = { "username": user.username, "email": "alice@test.com", "password": "testtest" }
+
+    client.post("/users", json=payload)
+    hashed = hash_pool.count
+
+    response = client.post("/users", json=payload)
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json() == { "detail": "Username already exists" }
+    assert hash_pool.count == hashed
+
+
+def test_create_user_after_delete_frees_username(client):
+    payload = { "username": "alice", "email": "alice@example.com", "password": "secret" }
+    user_id = client.post("/users", json=payload).json()["id"]
+    token = client.post(
+        "/auth/token",
+        data={ "username": payload["email"], "password": payload["password"] }
+    ).json()["access_token"]
+
+    client.delete(
+        f"/users/{user_id}",
+        headers={ "Authorization": f"Bearer {token}" }
+    )
+
+    response = client.post("/users", json=payload)
+
+    assert response.status_code == HTTPStatus.CREATED
+
+
+def test_create_user_ignores_stale_taken_cache(client):
+    # Nome liberado em outro worker: o cache deste ainda o tem como usado.
+    mark_taken("alice", "alice@example.com")
+
+    response = client.post("/users", json={ "username": "alice", "email": "alice@example.com", "password": "secret" })
+
+    assert response.status_code == HTTPStatus.CREATED
+    assert taken_cache.get(("username", "alice"))
+
+
 def test_read_users(client):
     response = client.get("/users")
 
     assert response.status_code == HTTPStatus.OK
-    assert response.json() == { "users": [] }
+    assert response.json() == { "users": [], "next_cursor": None }
 
 
 def test_read_user_only(client, user):
@@ -67,13 +110,59 @@ def test_read_user_only(client, user):
         }
     
 
+def test_read_user_etag_not_modified(client, user, token):
+    etag = client.get(f"/users/{user.id}").headers["etag"]
+
+    response = client.get(f"/users/{user.id}", headers={ "If-None-Match": etag })
+
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+    client.put(
+        f"/users/{user.id}",
+        headers={ "Authorization": f"Bearer {token}" },
+        json={ "username": "bob", "email": "bob@example.com", "password": "secret" }
+    )
+    response = client.get(f"/users/{user.id}", headers={ "If-None-Match": etag })
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()["username"] == "bob"
+
+
 def test_read_users_with_users(client, user):
     user_schema = UserPublic.model_validate(user).model_dump()
     response = client.get("/users")
 
-    assert response.json() == { "users": [user_schema] }
+    assert response.json() == { "users": [user_schema], "next_cursor": None }
     
 
+def test_read_users_cursor_pagination(client, user, other_user):
+    response = client.get("/users/?limit=1")
+    first_page = response.json()
+
+    assert [u["id"] for u in first_page["users"]] == [user.id]
+    assert first_page["next_cursor"]
+
+    response = client.get(f"/users/?limit=1&cursor={first_page['next_cursor']}")
+    second_page = response.json()
+
+    assert [u["id"] for u in second_page["users"]] == [other_user.id]
+    assert second_page["next_cursor"] is None
+
+
+def test_read_users_limit_zero(client, user):
+    response = client.get("/users/?limit=0")
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == { "users": [], "next_cursor": None }
+
+
+def test_read_users_invalid_cursor(client):
+    response = client.get("/users/?cursor=invalid")
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json() == { "detail": "Invalid cursor" }
+
+
 def test_read_user_only_not_found(client, user):
     response = client.get("/users/2")
 
@@ -164,3 +253,36 @@ def test_delete_user_wrong_user(client, other_user, token):
 
     assert response.status_code == HTTPStatus.FORBIDDEN
     assert response.json() == { "detail": "Not enough permissions" }
+
+
+def test_update_user_invalidates_cached_user(client, user, token):
+    client.put(
+        f"/users/{user.id}",
+        headers={ "Authorization": f"Bearer {token}" },
+        json={
+            "username": "bob",
+            "email": "bob@example.com",
+            "password": "mynewpassword",
+        }
+    )
+
+    response = client.post(
+        "/auth/refresh_token",
+        headers={ "Authorization": f"Bearer {token}" }
+    )
+
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
+def test_delete_user_invalidates_cached_user(client, user, token):
+    client.delete(
+        f"/users/{user.id}",
+        headers={ "Authorization": f"Bearer {token}" }
+    )
+
+    response = client.delete(
+        f"/users/{user.id}",
+        headers={ "Authorization": f"Bearer {token}" }
+    )
+
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
@@ -1,7 +1,8 @@
 from http import HTTPStatus
+from freezegun import freeze_time
 from jwt import decode
 
-from app.security import create_access_token, settings
+from app.security import create_access_token, decode_access_token, settings, token_cache, user_cache
 
 
 def test_jwt():
@@ -48,3 +49,49 @@ def test_get_current_user_does_not_exists(client):
 
     assert response.status_code == HTTPStatus.UNAUTHORIZED
     assert response.json() == { "detail": "Could not validate credentials" }
+
+
+def test_get_current_user_uses_cache(client, token):
+    user_cache.clear()
+
+    for _ in range(2):
+        response = client.post(
+            "/auth/refresh_token",
+            headers={ "Authorization": f"Bearer {token}" }
+        )
+
+        assert response.status_code == HTTPStatus.OK
+
+    assert user_cache.hits == 1
+    assert user_cache.misses == 1
+
+
+def test_decode_access_token_uses_cache():
+    token_cache.clear()
+    token = create_access_token({ "sub": "test@test" })
+
+    first = decode_access_token(token)
+    second = decode_access_token(token)
+
+    assert first is second
+    assert token_cache.hits == 1
+
+
+def test_cached_token_still_expires(client, user):
+    with freeze_time("2023-07-14 12:00:00"):
+        token = create_access_token({ "sub": user.email })
+        response = client.post(
+            "/auth/refresh_token",
+            headers={ "Authorization": f"Bearer {token}" }
+        )
+
+        assert response.status_code == HTTPStatus.OK
+
+    with freeze_time("2023-07-14 12:31:00"):
+        response = client.post(
+            "/auth/refresh_token",
+            headers={ "Authorization": f"Bearer {token}" }
+        )
+
+        assert response.status_code == HTTPStatus.UNAUTHORIZED
+        assert response.json() == { "detail": "Expired credentials" }
@@ -0,0 +1,63 @@
+import logging
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+
+from app.slow_queries import instrument_slow_queries, redact
+
+
+def test_redact_positional_and_named_parameters():
+    assert redact(("alice", "hash", "hash_old"), ("username", "password", "password_1")) == ("alice", "***", "***")
+    assert redact({ "email": "a@a.com", "password": "hash" }, None) == { "email": "a@a.com", "password": "***" }
+    assert redact(("x",), None) == ("x",)
+
+
+def test_slow_query_logged_with_route_and_redacted_password(client, session, user, token, caplog):
+    instrument_slow_queries(session.bind, threshold_ms=0, explain=True)
+
+    with caplog.at_level(logging.WARNING, logger="app.slow_queries"):
+        client.put(
+            f"/users/{user.id}",
+            headers={ "Authorization": f"Bearer {token}" },
+            json={ "username": "bob", "email": "bob@example.com", "password": "mynewpassword" }
+        )
+
+    records = [record for record in caplog.records if record.route == "PUT /users/{id}"]
+    update = next(record for record in records if record.statement.startswith("UPDATE users"))
+    select = next(record for record in records if record.statement.startswith("SELECT"))
+
+    assert "***" in update.parameters
+    assert not any(str(value).startswith("$argon2") for value in update.parameters)
+    assert "bob" in update.parameters
+    assert "SEARCH users USING INDEX" in select.query_plan
+    assert "SEARCH users USING INTEGER PRIMARY KEY" in update.query_plan
+    assert update.duration_ms >= 0
+
+
+def test_fast_queries_are_not_logged(client, session, user, caplog):
+    instrument_slow_queries(session.bind, threshold_ms=60_000)
+
+    with caplog.at_level(logging.WARNING, logger="app.slow_queries"):
+        client.get(f"/users/{user.id}")
+
+    assert not caplog.records
+
+
+@pytest.mark.asyncio
+async def test_failed_query_logged_and_timed_once(session, user, caplog):
+    instrument_slow_queries(session.bind, threshold_ms=0)
+    username = user.username
+
+    with caplog.at_level(logging.WARNING, logger="app.slow_queries"):
+        with pytest.raises(IntegrityError):
+            await session.execute(
+                text("INSERT INTO users (username, password, email) VALUES (:username, :password, 'x@x.com')"),
+                { "username": username, "password": "secret" }
+            )
+
+    await session.rollback()
+
+    assert len(session.bind.sync_engine.dispatch.before_cursor_execute) == 1
+    assert caplog.records[-1].statement.startswith("INSERT INTO users")
+    assert caplog.records[-1].parameters == (username, "***")